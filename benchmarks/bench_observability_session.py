@@ -0,0 +1,99 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Per-call latency of the observability HTTP client against a local stub server,
+with a new session per tool call (the previous behaviour) and with the shared
+pooled session.
+
+    python benchmarks/bench_observability_session.py --calls 500 --connect-delay 0.005
+
+--connect-delay adds a pause to every new connection on the server side, to
+stand in for the TCP/TLS handshake to a remote observability stack.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from lumyn.tools.observability_stack.observability_stack_base_client import (  # noqa: E402
+    _create_retrying_session, get_shared_session)
+
+
+def start_stub_server(connect_delay: float) -> ThreadingHTTPServer:
+    body = json.dumps({"status": "success", "data": {"resultType": "vector", "result": []}}).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            time.sleep(connect_delay)
+            super().setup()
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(get_session, url: str, calls: int):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        session = get_session()
+        session.get(url, timeout=10).json()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name: str, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{name:<28} mean {statistics.mean(latencies) * 1000:7.2f} ms   p50 {statistics.median(latencies) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--connect-delay", type=float, default=0.0, help="seconds added to each new connection")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.connect_delay)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    url = f"{base_url}/prometheus/api/v1/query?query=up"
+
+    report("new session per call", measure(_create_retrying_session, url, args.calls))
+    report("shared pooled session", measure(lambda: get_shared_session(base_url), url, args.calls))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
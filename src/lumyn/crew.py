@@ -114,7 +114,7 @@ class LumynCrew():
     @task
     def sre_remediation_task(self) -> Task:
         tools = [
-            GetAlertsCustomTool(),
+            GetAlertsCustomTool(delta_mode=True, description=GetAlertsCustomTool.DELTA_DESCRIPTION),
             RemediationCustomTool(llm_backend=get_llm_backend_for_tools()),
             WaitCustomTool()
         ]
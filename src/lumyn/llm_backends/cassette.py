@@ -0,0 +1,143 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from .response_cache import ResponseCache
+from .usage import extract_usage
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+DEFAULT_CASSETTE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "outputs", "llm_cassette.jsonl")
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(KeyError):
+    pass
+
+
+class Cassette():
+    """
+    JSONL file of LLM requests and responses, written in `record` mode and served in `replay` mode.
+
+    Each entry carries an exact request `key` and a coarser `group` (the system
+    prompt). Replay hands out the next unused entry with the same key, and falls
+    back to the next unused entry of the same group, in recorded order, for
+    requests that differ only in volatile input such as timestamps.
+    """
+
+    def __init__(self, path: str = DEFAULT_CASSETTE_PATH, mode: str = REPLAY):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected {RECORD!r} or {REPLAY!r}.")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries = []
+        self._used = set()
+        self._by_key = defaultdict(deque)
+        self._by_group = defaultdict(deque)
+
+        if mode == RECORD:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # Each recording starts a fresh cassette so runs are never interleaved.
+            self._file = open(path, "w")
+        else:
+            with open(path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+            logger.info(f"Cassette: loaded {len(self._entries)} recorded LLM calls from {path}")
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        mode = os.getenv("LLM_CASSETTE_MODE", "").lower()
+        if not mode:
+            return None
+        return cls(path=os.getenv("LLM_CASSETTE_PATH") or DEFAULT_CASSETTE_PATH, mode=mode)
+
+    @staticmethod
+    def make_key(value: Any) -> str:
+        return ResponseCache.make_key({"value": value})
+
+    def _index(self, entry: Dict[str, Any]):
+        index = len(self._entries)
+        self._entries.append(entry)
+        self._by_key[(entry["source"], entry["key"])].append(index)
+        self._by_group[(entry["source"], entry["group"])].append(index)
+
+    def _next_unused(self, indices: deque) -> Optional[int]:
+        while indices and indices[0] in self._used:
+            indices.popleft()
+        return indices.popleft() if indices else None
+
+    def record(self, source: str, key: str, group: str, request: Dict[str, Any], response: Dict[str, Any]):
+        entry = {"source": source, "key": key, "group": group, "request": request, "response": response}
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def replay(self, source: str, key: str, group: str) -> Dict[str, Any]:
+        with self._lock:
+            index = self._next_unused(self._by_key[(source, key)])
+            if index is None:
+                index = self._next_unused(self._by_group[(source, group)])
+                if index is not None:
+                    logger.info(f"Cassette: no exact match for a {source} request, replaying the next call with the same system prompt")
+            if index is None:
+                raise CassetteMiss(f"No recorded {source} LLM call left in {self.path} for this request.")
+            self._used.add(index)
+            return self._entries[index]["response"]
+
+    def close(self):
+        if self.mode == RECORD:
+            with self._lock:
+                self._file.close()
+
+
+def completion_to_dict(completion: Any) -> Dict[str, Any]:
+    """The parts of a litellm completion that LiteLLMBackend reads, as plain JSON."""
+    choice = completion.choices[0]
+    return {
+        "finish_reason": choice.finish_reason,
+        "content": choice.message.content,
+        "tool_calls": [
+            {"name": tool_call.function.name, "arguments": tool_call.function.arguments}
+            for tool_call in (getattr(choice.message, "tool_calls", None) or [])
+        ],
+        "usage": extract_usage(getattr(completion, "usage", None)),
+    }
+
+
+def completion_from_dict(data: Dict[str, Any]) -> Any:
+    """Rebuild an object shaped like a litellm completion from `completion_to_dict` output."""
+    tool_calls = [
+        SimpleNamespace(function=SimpleNamespace(name=tool_call["name"], arguments=tool_call["arguments"]))
+        for tool_call in data.get("tool_calls") or []
+    ]
+    message = SimpleNamespace(content=data.get("content"), tool_calls=tool_calls or None)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(finish_reason=data.get("finish_reason"), message=message)],
+        usage=data.get("usage"),
+    )
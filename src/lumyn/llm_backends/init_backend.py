@@ -13,246 +13,279 @@
 # limitations under the License.
 
 
+import json
 import os
-from crewai import LLM
-from dotenv import load_dotenv
-
-from .litellm_backend import LiteLLMBackend
-
-load_dotenv()
-
-global PROVIDER_AGENTS, MODEL_AGENTS, URL_AGENTS, API_VERSION_AGENTS, API_KEY_AGENTS, REASONING_EFFORT_AGENTS, SEED_AGENTS, TOP_P_AGENTS, TEMPERATURE_AGENTS, THINKING_AGENTS, THINKING_BUDGET_AGENTS, MAX_TOKENS_AGENTS
-global PROVIDER_TOOLS, MODEL_TOOLS, URL_TOOLS, API_VERSION_TOOLS, API_KEY_TOOLS, REASONING_EFFORT_TOOLS, SEED_TOOLS, TOP_P_TOOLS, TEMPERATURE_TOOLS, THINKING_TOOLS, THINKING_BUDGET_TOOLS, MAX_TOKENS_TOOLS
-
-try:
-    PROVIDER_AGENTS = os.environ["PROVIDER_AGENTS"]
-except KeyError:
-    PROVIDER_AGENTS = ""
-    print(f"Unable to find environment variable - PROVIDER_AGENTS.")
-    raise
-
-try:
-    PROVIDER_TOOLS = os.environ["PROVIDER_TOOLS"]
-except KeyError:
-    PROVIDER_TOOLS = ""
-    print(f"Unable to find environment variable - PROVIDER_TOOLS.")
-    raise
-
-try:
-    MODEL_AGENTS  = os.environ["MODEL_AGENTS"]
-except KeyError:
-    MODEL_AGENTS = ""
-    print(f"Unable to find environment variable - MODEL_AGENTS.")
-    raise
-
-try:
-    MODEL_TOOLS = os.environ["MODEL_TOOLS"]
-except KeyError:
-    MODEL_TOOLS = ""
-    print(f"Unable to find environment variable - MODEL_TOOLS.")
-    raise
-
-try:
-    URL_AGENTS = os.environ["URL_AGENTS"].rstrip("/")
-except KeyError:
-    URL_AGENTS = ""
-    print(f"Unable to find environment variable - URL_AGENTS.")
-    raise
-
-try:
-    URL_TOOLS = os.environ["URL_TOOLS"].rstrip("/")
-except KeyError:
-    URL_TOOLS = ""
-    print(f"Unable to find environment variable - URL_TOOLS.")
-    raise
-
-try:
-    API_KEY_AGENTS = os.environ["API_KEY_AGENTS"]
-except KeyError:
-    print("Unable to find environment variable - API_KEY_AGENTS.")
-    raise
-
-try:
-    API_KEY_TOOLS = os.environ["API_KEY_TOOLS"]
-except KeyError:
-    print("Unable to find environment variable - API_KEY_TOOLS.")
-    raise
-
-try:
-    SEED_AGENTS = int(os.environ["SEED_AGENTS"])
-except KeyError:
-    SEED_AGENTS = 10
-    print(f"Unable to find environment variable - SEED_AGENT. Defaulting to {SEED_AGENTS}.")
-
-try:
-    SEED_TOOLS = int(os.environ["SEED_TOOLS"])
-except KeyError:
-    SEED_TOOLS = 10
-    print(f"Unable to find environment variable - SEED_TOOLS. Defaulting to {SEED_TOOLS}.")
-
-try:
-    TOP_P_AGENTS = float(os.environ["TOP_P_AGENTS"])
-except KeyError:
-    TOP_P_AGENTS = 0.95
-    print(f"Unable to find environment variable - TOP_P_AGENTS. Defaulting to {TOP_P_AGENTS}.")
-
-try:
-    TOP_P_TOOLS = float(os.environ["TOP_P_TOOLS"])
-except KeyError:
-    TOP_P_TOOLS = 0.95
-    print(f"Unable to find environment variable - TOP_P_TOOLS. Defaulting to {TOP_P_TOOLS}.")
-
-try:
-    TEMPERATURE_AGENTS = float(os.environ["TEMPERATURE_AGENTS"])
-except KeyError:
-    TEMPERATURE_AGENTS = 0.0
-    print(f"Unable to find environment variable - TEMPERATURE_AGENTS. Defaulting to {TEMPERATURE_AGENTS}.")
-except ValueError as e:
-    print("Incorrect TEMPERATURE_AGENTS value:", e)
-    raise
-
-try:
-    TEMPERATURE_TOOLS = float(os.environ["TEMPERATURE_TOOLS"])
-except KeyError:
-    TEMPERATURE_TOOLS = 0.0
-    print(f"Unable to find environment variable - TEMPERATURE_TOOLS. Defaulting to {TEMPERATURE_TOOLS}.")
-except ValueError as e:
-    print("Incorrect TEMPERATURE_TOOLS value:", e)
-    raise
-
-try:
-    REASONING_EFFORT_AGENTS = str(os.environ["REASONING_EFFORT_AGENTS"]).lower()
-except KeyError:
-    REASONING_EFFORT_AGENTS = ""
-    print(f"Unable to find environment variable - REASONING_EFFORT_AGENTS.")
-
-try:
-    REASONING_EFFORT_TOOLS = str(os.environ["REASONING_EFFORT_TOOLS"]).lower()
-except KeyError:
-    REASONING_EFFORT_TOOLS = ""
-    print(f"Unable to find environment variable - REASONING_EFFORT_TOOLS.")
-
-try:
-    API_VERSION_AGENTS  = os.environ["API_VERSION_AGENTS"]
-except KeyError:
-    API_VERSION_AGENTS = ""
-    print(f"Unable to find environment variable - API_VERSION_AGENTS.")
-
-try:
-    API_VERSION_TOOLS  = os.environ["API_VERSION_TOOLS"]
-except KeyError:
-    API_VERSION_TOOLS = ""
-    print(f"Unable to find environment variable - API_VERSION_TOOLS.")
-
-try:
-    THINKING_AGENTS  = os.environ["THINKING_AGENTS"]
-except KeyError:
-    THINKING_AGENTS = ""
-    print(f"Unable to find environment variable - THINKING_AGENTS.")
-
-try:
-    THINKING_TOOLS  = os.environ["THINKING_TOOLS"]
-except KeyError:
-    THINKING_TOOLS = ""
-    print(f"Unable to find environment variable - THINKING_TOOLS.")
-
-try:
-    THINKING_BUDGET_AGENTS  = int(os.environ["THINKING_BUDGET_AGENTS"])
-except KeyError:
-    THINKING_BUDGET_AGENTS = 16000
-    print(f"Unable to find environment variable - THINKING_BUDGET_AGENTS.")
-
-try:
-    THINKING_BUDGET_TOOLS  = int(os.environ["THINKING_BUDGET_TOOLS"])
-except KeyError:
-    THINKING_BUDGET_TOOLS = 16000
-    print(f"Unable to find environment variable - THINKING_BUDGET_TOOLS.")
-
-try:
-    MAX_TOKENS_AGENTS  = int(os.environ["MAX_TOKENS_AGENTS"])
-except KeyError:
-    MAX_TOKENS_AGENTS = 24000
-    print(f"Unable to find environment variable - MAX_TOKENS_AGENTS.")
-
-try:
-    MAX_TOKENS_TOOLS  = int(os.environ["MAX_TOKENS_TOOLS"])
-except KeyError:
-    MAX_TOKENS_TOOLS = 24000
-    print(f"Unable to find environment variable - MAX_TOKENS_TOOLS.")
-
-if PROVIDER_AGENTS == "watsonx" or PROVIDER_TOOLS == "watsonx":
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from .cassette import REPLAY, Cassette
+from .metrics import agent_failure_metrics_callback, agent_metrics_callback
+from .rate_limiter import RateLimiter, get_rate_limiter, make_litellm_rate_limit_callback
+from .registry import BACKEND_REGISTRY, configure_shared_http_client
+from .response_cache import ResponseCache
+from .routing import endpoint_kwargs, load_routes
+from .usage import agent_usage_callback
+
+# Configuration is read from the environment on first use rather than at import,
+# and litellm/crewai are only imported once a backend is requested, so importing
+# this module (and the tools) stays cheap.
+
+
+def _required(name: str, convert: Callable[[str], Any] = str) -> Any:
     try:
-        os.environ["WX_PROJECT_ID"]
+        return convert(os.environ[name])
     except KeyError:
-        print(f"To use WatsonX you must provide the WX_PROJECT_ID environment variable.")
+        print(f"Unable to find environment variable - {name}.")
         raise
 
 
-def get_llm_backend_for_agents():
-    if PROVIDER_AGENTS.lower() == "rits":
-        return LLM(model=f"openai/{MODEL_AGENTS}",
-                   base_url=URL_AGENTS,
-                   api_key="API_KEY",
-                   api_version=API_VERSION_AGENTS,
-                   seed=SEED_AGENTS,
-                   top_p=TOP_P_AGENTS,
-                   temperature=TEMPERATURE_AGENTS,
-                   max_tokens=MAX_TOKENS_AGENTS,
-                   extra_headers={'RITS_API_KEY': API_KEY_AGENTS}
-                   )
-    elif THINKING_AGENTS == "anthropic":
-        return LLM(model=f"{PROVIDER_AGENTS}/{MODEL_AGENTS}",
-                   base_url=URL_AGENTS,
-                   api_key=API_KEY_AGENTS,
-                   api_version=API_VERSION_AGENTS,
-                   seed=SEED_AGENTS,
-                   temperature=TEMPERATURE_AGENTS,
-                   reasoning_effort=REASONING_EFFORT_AGENTS,
-                   max_tokens=MAX_TOKENS_AGENTS,
-                   thinking={ "type": "enabled", "budget_tokens": int(THINKING_BUDGET_TOOLS) }
-                   )
-    else:
-        return LLM(model=f"{PROVIDER_AGENTS}/{MODEL_AGENTS}",
-                   base_url=URL_AGENTS,
-                   api_key=API_KEY_AGENTS,
-                   api_version=API_VERSION_AGENTS,
-                   seed=SEED_AGENTS,
-                   top_p=TOP_P_AGENTS,
-                   temperature=TEMPERATURE_AGENTS,
-                   reasoning_effort=REASONING_EFFORT_AGENTS,
-                   max_tokens=MAX_TOKENS_AGENTS,
-                   )
-
-
-
-
-def get_llm_backend_for_tools():
-    if PROVIDER_TOOLS.lower() == "rits":
-        return LiteLLMBackend(provider="openai",
-                              model_name=MODEL_TOOLS,
-                              url=URL_TOOLS,
-                              api_key="API_KEY",
-                              api_version=API_VERSION_TOOLS,
-                              seed=SEED_TOOLS,
-                              top_p=TOP_P_TOOLS,
-                              temperature=TEMPERATURE_TOOLS,
-                              reasoning_effort=REASONING_EFFORT_TOOLS,
-                              max_tokens=MAX_TOKENS_TOOLS,
-                              thinking_tools=THINKING_TOOLS,
-                              thinking_budget_tools=THINKING_BUDGET_TOOLS,
-                              extra_headers={ 'RITS_API_KEY': API_KEY_TOOLS }
-                              )
+def _optional(name: str, default: Any, convert: Callable[[str], Any] = str) -> Any:
+    try:
+        value = os.environ[name]
+    except KeyError:
+        print(f"Unable to find environment variable - {name}. Defaulting to {default}.")
+        return default
+    try:
+        return convert(value)
+    except ValueError as e:
+        print(f"Incorrect {name} value:", e)
+        raise
+
+
+def _endpoints(value: str) -> List[Dict[str, Any]]:
+    # .env.tmpl leaves ENDPOINTS_TOOLS blank, which means a single endpoint.
+    if not value.strip():
+        return []
+    endpoints = json.loads(value)
+    if not isinstance(endpoints, list) or not all(isinstance(endpoint, dict) for endpoint in endpoints):
+        raise ValueError("ENDPOINTS_TOOLS must be a JSON list of objects.")
+    return endpoints
+
+
+@dataclass(frozen=True)
+class BackendConfig():
+    """Settings of one LLM backend, read from the <NAME>_AGENTS or <NAME>_TOOLS variables."""
+    provider: str
+    model: str
+    url: str
+    api_key: str
+    api_version: str = ""
+    seed: int = 10
+    top_p: float = 0.95
+    temperature: float = 0.0
+    reasoning_effort: str = ""
+    thinking: str = ""
+    thinking_budget: int = 16000
+    max_tokens: int = 24000
+
+    @classmethod
+    def from_env(cls, suffix: str) -> "BackendConfig":
+        return cls(provider=_required(f"PROVIDER_{suffix}"),
+                   model=_required(f"MODEL_{suffix}"),
+                   url=_required(f"URL_{suffix}", lambda url: url.rstrip("/")),
+                   api_key=_required(f"API_KEY_{suffix}"),
+                   api_version=_optional(f"API_VERSION_{suffix}", ""),
+                   seed=_optional(f"SEED_{suffix}", 10, int),
+                   top_p=_optional(f"TOP_P_{suffix}", 0.95, float),
+                   temperature=_optional(f"TEMPERATURE_{suffix}", 0.0, float),
+                   reasoning_effort=_optional(f"REASONING_EFFORT_{suffix}", "", lambda effort: effort.lower()),
+                   thinking=_optional(f"THINKING_{suffix}", ""),
+                   thinking_budget=_optional(f"THINKING_BUDGET_{suffix}", 16000, int),
+                   max_tokens=_optional(f"MAX_TOKENS_{suffix}", 24000, int))
+
+
+@dataclass(frozen=True)
+class LLMConfig():
+    agents: BackendConfig
+    tools: BackendConfig
+    stream_tools: bool = False
+    token_budget_tools: int = 32000
+    rate_limit_retries: int = 3
+    routes_tools: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    endpoints_tools: List[Dict[str, Any]] = field(default_factory=list)
+    hedge_tools: bool = False
+
+    @classmethod
+    def from_env(cls) -> "LLMConfig":
+        config = cls(agents=BackendConfig.from_env("AGENTS"),
+                     tools=BackendConfig.from_env("TOOLS"),
+                     stream_tools=os.getenv("STREAM_TOOLS", "False") == "True",
+                     token_budget_tools=_optional("TOKEN_BUDGET_TOOLS", 32000, int),
+                     rate_limit_retries=_optional("LLM_RATE_LIMIT_RETRIES", 3, int),
+                     routes_tools=load_routes(),
+                     endpoints_tools=_optional("ENDPOINTS_TOOLS", [], _endpoints),
+                     hedge_tools=os.getenv("HEDGE_TOOLS", "False") == "True")
+        if config.agents.provider == "watsonx" or config.tools.provider == "watsonx":
+            try:
+                os.environ["WX_PROJECT_ID"]
+            except KeyError:
+                print(f"To use WatsonX you must provide the WX_PROJECT_ID environment variable.")
+                raise
+        return config
+
+
+@lru_cache(maxsize=None)
+def get_llm_config() -> LLMConfig:
+    """Load and validate the LLM configuration once; `get_llm_config.cache_clear()` reloads it."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return LLMConfig.from_env()
+
+
+@lru_cache(maxsize=None)
+def get_response_cache() -> Optional[ResponseCache]:
+    cache = ResponseCache.from_env()
+    if cache is not None:
+        print(f"LLM response cache enabled for tools at {cache.path}.")
+    return cache
+
+
+@lru_cache(maxsize=None)
+def get_cassette() -> Optional[Cassette]:
+    cassette = Cassette.from_env()
+    if cassette is not None:
+        print(f"LLM cassette in {cassette.mode} mode at {cassette.path}.")
+    return cassette
+
+
+@lru_cache(maxsize=None)
+def _shared_rate_limiter() -> RateLimiter:
+    # One limiter for the agents and every tool backend, so they share the provider quota.
+    limiter = get_rate_limiter()
+    if limiter.enabled:
+        print(f"LLM rate limiter enabled: {limiter.requests_per_minute} requests/min, {limiter.tokens_per_minute} tokens/min.")
+    return limiter
+
+
+def _prompt_caching_kwargs_for_agents(config: BackendConfig):
+    # CrewAI resends the same agent system prompt (role, goal, backstory, tools) on every step.
+    if config.provider.lower() == "anthropic" or "claude" in config.model.lower():
+        return {"cache_control_injection_points": [{"location": "message", "role": "system"}]}
+    return {}
+
+
+def get_llm_backend_for_agents(**overrides):
+    """
+    Shared CrewAI LLM for the agents. Keyword overrides (any LLM argument) select
+    a differently configured instance, which is shared in turn.
+    """
+    return BACKEND_REGISTRY.get("agents", _create_llm_backend_for_agents, **overrides)
+
+
+def get_llm_backend_for_tools(**overrides):
+    """
+    Shared LiteLLMBackend for the tools. Keyword overrides (any LiteLLMBackend
+    argument) select a differently configured instance, which is shared in turn.
+    """
+    return BACKEND_REGISTRY.get("tools", _create_llm_backend_for_tools, **overrides)
+
+
+def _create_llm_backend_for_agents(**overrides):
+    import litellm
+    from crewai import LLM
+
+    config = get_llm_config()
+    agents, tools = config.agents, config.tools
+    rate_limiter = _shared_rate_limiter()
+    cassette = get_cassette()
+
+    configure_shared_http_client()
+    for callback_list, callback in ((litellm.success_callback, agent_usage_callback),
+                                    (litellm.success_callback, agent_metrics_callback),
+                                    (litellm.failure_callback, agent_failure_metrics_callback)):
+        if callback not in callback_list:
+            callback_list.append(callback)
+    if rate_limiter.enabled and not any(getattr(cb, "lumyn_rate_limiter", None) is rate_limiter for cb in litellm.callbacks):
+        callback = make_litellm_rate_limit_callback(rate_limiter)
+        callback.lumyn_rate_limiter = rate_limiter
+        litellm.callbacks.append(callback)
+
+    if agents.provider.lower() == "rits":
+        kwargs = dict(model=f"openai/{agents.model}",
+                      base_url=agents.url,
+                      api_key="API_KEY",
+                      api_version=agents.api_version,
+                      seed=agents.seed,
+                      top_p=agents.top_p,
+                      temperature=agents.temperature,
+                      max_tokens=agents.max_tokens,
+                      extra_headers={'RITS_API_KEY': agents.api_key}
+                      )
+    elif agents.thinking == "anthropic":
+        kwargs = dict(model=f"{agents.provider}/{agents.model}",
+                      base_url=agents.url,
+                      api_key=agents.api_key,
+                      api_version=agents.api_version,
+                      seed=agents.seed,
+                      temperature=agents.temperature,
+                      reasoning_effort=agents.reasoning_effort,
+                      max_tokens=agents.max_tokens,
+                      thinking={ "type": "enabled", "budget_tokens": int(tools.thinking_budget) },
+                      **_prompt_caching_kwargs_for_agents(agents)
+                      )
     else:
-        return LiteLLMBackend(provider=PROVIDER_TOOLS,
-                              model_name=MODEL_TOOLS,
-                              url=URL_TOOLS,
-                              api_key=API_KEY_TOOLS,
-                              api_version=API_VERSION_TOOLS,
-                              seed=SEED_TOOLS,
-                              top_p=TOP_P_TOOLS,
-                              temperature=TEMPERATURE_TOOLS,
-                              reasoning_effort=REASONING_EFFORT_TOOLS,
-                              max_tokens=MAX_TOKENS_TOOLS,
-                              thinking_tools=THINKING_TOOLS,
-                              thinking_budget_tools=THINKING_BUDGET_TOOLS,
-                              )
\ No newline at end of file
+        kwargs = dict(model=f"{agents.provider}/{agents.model}",
+                      base_url=agents.url,
+                      api_key=agents.api_key,
+                      api_version=agents.api_version,
+                      seed=agents.seed,
+                      top_p=agents.top_p,
+                      temperature=agents.temperature,
+                      reasoning_effort=agents.reasoning_effort,
+                      max_tokens=agents.max_tokens,
+                      **_prompt_caching_kwargs_for_agents(agents)
+                      )
+    kwargs["num_retries"] = config.rate_limit_retries
+    kwargs.update(overrides)
+    if cassette is not None:
+        from .replay_backend import CassetteAgentLLM
+        if cassette.mode == REPLAY:
+            return CassetteAgentLLM(cassette, model=kwargs["model"], temperature=kwargs.get("temperature"))
+        return CassetteAgentLLM(cassette, model=kwargs["model"], inner=LLM(**kwargs), temperature=kwargs.get("temperature"))
+    return LLM(**kwargs)
+
+
+# Fields of an ENDPOINTS_TOOLS entry that describe the connection; others (e.g. `name`) are labels.
+ENDPOINT_KEYS = ("provider", "model", "url", "api_key", "api_version", "extra_headers")
+
+
+def _create_llm_backend_for_tools(**overrides):
+    from .litellm_backend import LiteLLMBackend
+
+    config = get_llm_config()
+    tools = config.tools
+    cassette = get_cassette()
+
+    configure_shared_http_client()
+
+    kwargs = dict(seed=tools.seed,
+                  top_p=tools.top_p,
+                  temperature=tools.temperature,
+                  reasoning_effort=tools.reasoning_effort,
+                  max_tokens=tools.max_tokens,
+                  thinking_tools=tools.thinking,
+                  thinking_budget_tools=tools.thinking_budget,
+                  cache=get_response_cache(),
+                  stream=config.stream_tools,
+                  input_token_budget=config.token_budget_tools,
+                  routes=config.routes_tools,
+                  rate_limiter=_shared_rate_limiter(),
+                  rate_limit_retries=config.rate_limit_retries,
+                  **endpoint_kwargs(tools.provider, tools.model, tools.url, tools.api_key, tools.api_version)
+                  )
+    kwargs.update(overrides)
+    if cassette is not None:
+        from .replay_backend import ReplayLLMBackend
+        return ReplayLLMBackend(cassette, **kwargs)
+    if config.endpoints_tools and not overrides:
+        from .router_backend import RouterLLMBackend
+        # Each entry of ENDPOINTS_TOOLS is one deployment; unset fields fall back to the *_TOOLS settings.
+        endpoints = [{"provider": tools.provider, "model": tools.model, "url": tools.url, "api_key": tools.api_key,
+                      "api_version": tools.api_version, **endpoint} for endpoint in config.endpoints_tools]
+        backends = [LiteLLMBackend(**{**kwargs, **endpoint_kwargs(**{key: endpoint[key] for key in ENDPOINT_KEYS if key in endpoint})})
+                    for endpoint in endpoints]
+        print(f"Routing tool LLM calls over {len(backends)} endpoints (hedging {'on' if config.hedge_tools else 'off'}).")
+        return RouterLLMBackend(backends, names=[endpoint.get("name") or f"{endpoint['provider']}/{endpoint['model']}@{endpoint['url']}" for endpoint in endpoints],
+                                hedge=config.hedge_tools, timeout=float(os.getenv("LLM_HTTP_TIMEOUT", 600)))
+    return LiteLLMBackend(**kwargs)
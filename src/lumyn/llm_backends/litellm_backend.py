@@ -16,16 +16,29 @@
 import os
 import re
 import json
+import time
+import asyncio
 import logging
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 import litellm
 from dotenv import load_dotenv
 
+from .metrics import LLM_METRICS
+from .rate_limiter import RateLimiter, estimate_tokens, retry_after_seconds
+from .response_cache import ResponseCache
+from .routing import CONNECTION_KEYS, endpoint_kwargs, resolve_route
+from .token_budget import count_tokens, trim_payload
+from .usage import TOOLS_SOURCE, record_usage
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Smallest extended-thinking budget Anthropic accepts.
+MIN_THINKING_BUDGET = 1024
+
+
 class LiteLLMBackend():
     def __init__(self, 
                  provider: str,
@@ -40,7 +53,13 @@ class LiteLLMBackend():
                  thinking_tools: str,
                  thinking_budget_tools: int,
                  max_tokens: int,
-                 extra_headers: Optional[Dict[str, str]] = None):
+                 extra_headers: Optional[Dict[str, str]] = None,
+                 cache: Optional[ResponseCache] = None,
+                 stream: bool = False,
+                 input_token_budget: int = 0,
+                 routes: Optional[Dict[str, Dict[str, Any]]] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 rate_limit_retries: int = 3):
         self.provider = provider
         self.model_name = model_name
         self.url = url
@@ -54,13 +73,194 @@ class LiteLLMBackend():
         self.thinking_budget_tools = thinking_budget_tools
         self.max_tokens = max_tokens
         self.extra_headers = extra_headers
+        self.cache = cache
+        self.stream = stream
+        self.input_token_budget = input_token_budget
+        self.routes = routes or {}
+        self.rate_limiter = rate_limiter
+        self.rate_limit_retries = rate_limit_retries
         litellm.drop_params = True
 
 
-    def inference(self, system_prompt: str, input: str, tools: Optional[list[any]] = None) -> str:
+    def inference(self, system_prompt: str, input: str, tools: Optional[list[any]] = None, prefix: str = "", call_site: Optional[str] = None, response_format: Optional[Dict[str, Any]] = None) -> str:
+        """
+        `prefix` is static text (e.g. in-context examples) sent ahead of `input`
+        in the user turn. It is kept byte-identical across calls and marked
+        cacheable for providers that support prompt caching.
+
+        `call_site` (e.g. "nl2kubectl.generate") selects a route from the routing
+        table, which may swap the model, max_tokens or thinking budget.
+
+        `response_format` (an OpenAI-style JSON-schema response format) is sent
+        only to models that support structured outputs.
+        """
         logger.info(f"NL input received: {input}")
         print(f"NL input received: {input}")
 
+        kwargs = self._build_kwargs(system_prompt, input, tools, prefix, call_site, response_format)
+
+        cache_key, hit, cached = self._cache_lookup(kwargs)
+        if hit:
+            return cached
+
+        completion = self._complete(kwargs)
+        result = self._parse_completion(completion)
+
+        self._cache_store(cache_key, result)
+        return result
+
+    async def ainference(self, system_prompt: str, input: str, tools: Optional[list[any]] = None, prefix: str = "", call_site: Optional[str] = None, response_format: Optional[Dict[str, Any]] = None) -> str:
+        logger.info(f"NL input received: {input}")
+        print(f"NL input received: {input}")
+
+        kwargs = self._build_kwargs(system_prompt, input, tools, prefix, call_site, response_format)
+
+        cache_key, hit, cached = self._cache_lookup(kwargs)
+        if hit:
+            return cached
+
+        completion = await self._acomplete(kwargs)
+        result = self._parse_completion(completion)
+
+        self._cache_store(cache_key, result)
+        return result
+
+    def inference_until_fence(self, system_prompt: str, input: str, language: str, prefix: str = "", call_site: Optional[str] = None) -> str:
+        """
+        Like inference, but for prompts whose answer is a single ```<language> block.
+
+        With streaming enabled the completion is consumed as it arrives and the
+        stream is closed as soon as the first such block is complete, so trailing
+        explanation tokens are never generated. The returned text always
+        contains the closed block when the model produced one.
+        """
+        if not self.stream:
+            return self.inference(system_prompt, input, prefix=prefix, call_site=call_site)
+
+        logger.info(f"NL input received: {input}")
+        print(f"NL input received: {input}")
+
+        kwargs = self._build_kwargs(system_prompt, input, prefix=prefix, call_site=call_site)
+
+        # Truncated responses must not be served to plain inference calls, so they get their own keys.
+        cache_key, hit, cached = self._cache_lookup({**kwargs, "until_fence": language})
+        if hit:
+            return cached
+
+        fence = re.compile(rf"```{re.escape(language)}\n(.*?)\n```", re.DOTALL)
+        estimated = estimate_tokens(kwargs["messages"])
+        start = time.monotonic()
+        response = self._complete({**kwargs, "stream": True, "stream_options": {"include_usage": True}})
+        content = ""
+        ttft = None
+        usage = None
+        try:
+            for chunk in response:
+                # The usage block arrives on the final chunk, which has no choices.
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if ttft is None:
+                        ttft = time.monotonic() - start
+                    content += delta
+                    if fence.search(content):
+                        logger.info(f"Closed ```{language} block received, stopping stream after {len(content)} characters")
+                        break
+        except Exception:
+            LLM_METRICS.observe_error(TOOLS_SOURCE, call_site, kwargs["model"])
+            raise
+        finally:
+            close = getattr(getattr(response, "completion_stream", None), "close", None)
+            if callable(close):
+                close()
+        if usage is None:
+            # Stopping at the fence skips the final usage chunk, so the call is settled with estimates.
+            usage = {"prompt_tokens": estimated, "completion_tokens": estimate_tokens(content)}
+        self._settle(estimated, usage, kwargs, time.monotonic() - start, ttft=ttft)
+
+        self._cache_store(cache_key, content)
+        return content
+
+    def fit_to_budget(self, payload: Any, budget: Optional[int] = None) -> str:
+        """
+        Serialize a structured tool payload (e.g. a Jaeger or Prometheus response)
+        for the model, trimming it to `budget` tokens (default: input_token_budget,
+        0 disables trimming).
+        """
+        budget = budget or self.input_token_budget
+        if not budget:
+            return payload if isinstance(payload, str) else json.dumps(payload)
+        text, original_tokens, final_tokens = trim_payload(payload, budget, lambda t: count_tokens(t, self.model_name))
+        if final_tokens < original_tokens:
+            logger.info(f"Token budget: trimmed payload from {original_tokens} to {final_tokens} tokens, saving {original_tokens - final_tokens} tokens")
+        return text
+
+    def _complete(self, kwargs: Dict[str, Any]):
+        """
+        litellm.completion behind the shared rate limiter. On a 429 the limiter is
+        paused for the provider's Retry-After (or an exponential backoff) and the
+        request is queued again, up to rate_limit_retries times.
+        """
+        estimated = estimate_tokens(kwargs["messages"])
+        for attempt in range(self.rate_limit_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(estimated)
+            start = time.monotonic()
+            try:
+                completion = litellm.completion(**kwargs)
+            except litellm.RateLimitError as e:
+                self._observe_error(kwargs)
+                if self.rate_limiter is None or attempt == self.rate_limit_retries:
+                    raise
+                self.rate_limiter.pause(retry_after_seconds(e, default=2 ** attempt))
+                continue
+            except Exception:
+                self._observe_error(kwargs)
+                raise
+            if not kwargs.get("stream"):
+                self._settle(estimated, getattr(completion, "usage", None), kwargs, time.monotonic() - start)
+            return completion
+
+    async def _acomplete(self, kwargs: Dict[str, Any]):
+        estimated = estimate_tokens(kwargs["messages"])
+        for attempt in range(self.rate_limit_retries + 1):
+            if self.rate_limiter is not None:
+                await asyncio.to_thread(self.rate_limiter.acquire, estimated)
+            start = time.monotonic()
+            try:
+                completion = await litellm.acompletion(**kwargs)
+            except litellm.RateLimitError as e:
+                self._observe_error(kwargs)
+                if self.rate_limiter is None or attempt == self.rate_limit_retries:
+                    raise
+                self.rate_limiter.pause(retry_after_seconds(e, default=2 ** attempt))
+                continue
+            except Exception:
+                self._observe_error(kwargs)
+                raise
+            self._settle(estimated, getattr(completion, "usage", None), kwargs, time.monotonic() - start)
+            return completion
+
+    def _settle(self, estimated: int, usage: Any, kwargs: Dict[str, Any], latency: float, ttft: Optional[float] = None):
+        counts = record_usage(TOOLS_SOURCE, usage)
+        LLM_METRICS.observe(TOOLS_SOURCE, kwargs["metadata"].get("lumyn_call_site"), kwargs["model"], latency, ttft=ttft, usage=counts)
+        actual = counts["prompt_tokens"] + counts["completion_tokens"]
+        if self.rate_limiter is not None and actual:
+            self.rate_limiter.settle(estimated, actual)
+
+    @staticmethod
+    def _observe_error(kwargs: Dict[str, Any]):
+        LLM_METRICS.observe_error(TOOLS_SOURCE, kwargs["metadata"].get("lumyn_call_site"), kwargs["model"])
+
+    def _build_kwargs(self, system_prompt: str, input: str, tools: Optional[list[any]] = None, prefix: str = "", call_site: Optional[str] = None, response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        route = resolve_route(self.routes, call_site)
+        connection = self._connection(route)
+        provider, model_name = connection["provider"], connection["model_name"]
+        if route:
+            logger.info(f"LLM call site {call_site} routed to {provider}/{model_name}")
+
         messages = []
 
         if self.thinking_tools == "wx":
@@ -71,10 +271,26 @@ class LiteLLMBackend():
                 },
                 {
                     "role": "user",
-                    "content": system_prompt + "\n" + input
+                    "content": system_prompt + "\n" + prefix + input
+                }
+            ]
+        elif self._supports_cache_control(provider, model_name):
+            # Explicit cache breakpoints after the system prompt and after the static prefix.
+            user_content = [{"type": "text", "text": input}]
+            if prefix:
+                user_content.insert(0, {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}})
+            messages = [
+                {
+                    "role": "system",
+                    "content": [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+                },
+                {
+                    "role": "user",
+                    "content": user_content
                 }
             ]
         else:
+            # Providers with automatic prefix caching (e.g. OpenAI) only need the static text first.
             messages = [
                 {
                     "role": "system",
@@ -82,33 +298,110 @@ class LiteLLMBackend():
                 },
                 {
                     "role": "user",
-                    "content": input
+                    "content": prefix + input
                 }
             ]
 
         kwargs = {
-            "model": f"{self.provider}/{self.model_name}",
-            "api_key": self.api_key,
-            "api_base": self.url,
-            "api_version": self.api_version,
+            "model": f"{provider}/{model_name}",
+            "api_key": connection["api_key"],
+            "api_base": connection["url"],
+            "api_version": connection["api_version"],
             "seed": self.seed,
-            "temperature": self.temperature,
+            "temperature": route.get("temperature", self.temperature),
             "top_p": self.top_p,
-            "reasoning_effort": self.reasoning_effort,
-            "max_tokens": self.max_tokens,
+            "reasoning_effort": route.get("reasoning_effort", self.reasoning_effort),
+            "max_tokens": route.get("max_tokens", self.max_tokens),
             "messages": messages,
-            "extra_headers": self.extra_headers
+            "extra_headers": connection["extra_headers"],
+            "metadata": {"lumyn_source": TOOLS_SOURCE, "lumyn_call_site": call_site}
         }
 
         if tools:
             kwargs["tools"] = tools
 
-        if self.thinking_tools == "anthropic":
-            kwargs["thinking"] = { "type": "enabled", "budget_tokens": self.thinking_budget_tools }
+        # Anthropic requires MIN_THINKING_BUDGET <= budget_tokens < max_tokens, so a routed max_tokens
+        # caps the budget, and thinking is dropped when there is no room left for it.
+        thinking_budget = min(route.get("thinking_budget", self.thinking_budget_tools), kwargs["max_tokens"] - 1)
+        if thinking_budget < MIN_THINKING_BUDGET:
+            thinking_budget = 0
+        # Extended thinking (and dropping top_p for it) only applies when the call actually goes to a Claude model.
+        if self.thinking_tools == "anthropic" and thinking_budget and self._is_anthropic(provider, model_name):
+            kwargs["thinking"] = { "type": "enabled", "budget_tokens": thinking_budget }
             kwargs.pop("top_p")
 
-        completion = litellm.completion(**kwargs)
+        # Anthropic implements structured output as a forced tool call, which extended thinking does not allow.
+        if response_format and "thinking" not in kwargs and self.thinking_tools != "wx" and self._supports_response_schema(provider, model_name):
+            kwargs["response_format"] = response_format
+
+        return kwargs
+
+    def _connection(self, route: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Connection settings for a route. A route that sets any of CONNECTION_KEYS
+        is a separate deployment and uses only its own api_key, api_version and
+        extra_headers (rits is translated as for ENDPOINTS_TOOLS); other routes
+        inherit the default connection.
+        """
+        if not any(key in route for key in CONNECTION_KEYS):
+            return dict(provider=self.provider, model_name=route.get("model", self.model_name), url=self.url,
+                        api_key=self.api_key, api_version=self.api_version, extra_headers=self.extra_headers)
+        return endpoint_kwargs(provider=route.get("provider", self.provider),
+                               model=route.get("model", self.model_name),
+                               url=route.get("url", self.url),
+                               api_key=route.get("api_key", ""),
+                               api_version=route.get("api_version", ""),
+                               extra_headers=route.get("extra_headers"))
+
+    @staticmethod
+    def _is_anthropic(provider: str, model_name: str) -> bool:
+        return provider == "anthropic" or "claude" in model_name.lower()
+
+    @staticmethod
+    def _supports_response_schema(provider: str, model_name: str) -> bool:
+        try:
+            return litellm.supports_response_schema(model=model_name, custom_llm_provider=provider)
+        except Exception:
+            return False
+
+    @staticmethod
+    def _supports_cache_control(provider: str, model_name: str) -> bool:
+        if provider == "anthropic":
+            return True
+        return provider in ("bedrock", "vertex_ai") and "claude" in model_name.lower()
+
+    def _cache_key(self, kwargs: Dict[str, Any]) -> str:
+        # Credentials and tracing metadata do not change the response, so they are kept out of the key (and the cache file).
+        return ResponseCache.make_key({k: v for k, v in kwargs.items() if k not in ("api_key", "extra_headers", "metadata")})
+
+    def _cache_lookup(self, kwargs: Dict[str, Any]) -> Tuple[Optional[str], bool, Any]:
+        if self.cache is None:
+            return None, False, None
+        cache_key = self._cache_key(kwargs)
+        hit, cached = self.cache.get(cache_key)
+        if not hit:
+            return cache_key, False, None
+        logger.info(f"LLM response cache hit: {self.cache.stats()}")
+        return cache_key, True, self._decode_result(cached)
+
+    def _cache_store(self, cache_key: Optional[str], result):
+        if cache_key is not None and result is not None:
+            self.cache.put(cache_key, self._encode_result(result))
+
+    @staticmethod
+    def _encode_result(result) -> Dict[str, Any]:
+        if isinstance(result, tuple):
+            return {"function_name": result[0], "arguments": result[1]}
+        return {"content": result}
+
+    @staticmethod
+    def _decode_result(cached: Dict[str, Any]):
+        if "function_name" in cached:
+            return cached["function_name"], cached["arguments"]
+        return cached["content"]
 
+    @staticmethod
+    def _parse_completion(completion):
         finish_reason = completion.choices[0].finish_reason
         if finish_reason == "tool_calls":
             function_name = completion.choices[0].message.tool_calls[0].function.name
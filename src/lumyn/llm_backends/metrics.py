@@ -0,0 +1,196 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import bisect
+import json
+import logging
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from .usage import AGENTS_SOURCE, extract_usage, is_tool_call
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; LLM calls range from sub-second cache-warm replies to multi-minute reasoning.
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+TOKEN_TYPES = ("prompt_tokens", "completion_tokens", "reasoning_tokens", "cached_tokens", "cache_creation_tokens")
+LABELS = ("source", "call_site", "model")
+
+
+class Histogram():
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            total += count
+            yield bound, total
+
+
+class LLMMetrics():
+    """
+    In-process registry of per-call LLM metrics, labelled by source (tools or
+    agents), call site and model: call and error counts, token counts, latency
+    and time-to-first-token histograms.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.tokens = defaultdict(int)
+        self.latency = defaultdict(Histogram)
+        self.ttft = defaultdict(Histogram)
+
+    def observe(self, source: str, call_site: Optional[str], model: str, latency: float,
+                ttft: Optional[float] = None, usage: Optional[Dict[str, int]] = None):
+        key = (source, call_site or "", model or "")
+        with self._lock:
+            self.calls[key] += 1
+            self.latency[key].observe(latency)
+            if ttft is not None:
+                self.ttft[key].observe(ttft)
+            for token_type in TOKEN_TYPES:
+                if usage and usage.get(token_type):
+                    self.tokens[key + (token_type,)] += usage[token_type]
+
+    def observe_error(self, source: str, call_site: Optional[str], model: str):
+        with self._lock:
+            self.errors[(source, call_site or "", model or "")] += 1
+
+    def clear(self):
+        with self._lock:
+            for series in (self.calls, self.errors, self.tokens, self.latency, self.ttft):
+                series.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-series summary suitable for a JSON dump."""
+        with self._lock:
+            keys = set(self.calls) | set(self.errors)
+            series = []
+            for key in sorted(keys):
+                entry = dict(zip(LABELS, key))
+                entry["calls"] = self.calls.get(key, 0)
+                entry["errors"] = self.errors.get(key, 0)
+                entry["tokens"] = {token_type: self.tokens[key + (token_type,)] for token_type in TOKEN_TYPES if key + (token_type,) in self.tokens}
+                for name, histograms in (("latency", self.latency), ("ttft", self.ttft)):
+                    histogram = histograms.get(key)
+                    if histogram is not None and histogram.count:
+                        entry[f"{name}_seconds_mean"] = round(histogram.sum / histogram.count, 4)
+                        entry[f"{name}_seconds_count"] = histogram.count
+                series.append(entry)
+        return {"series": series}
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            _counter(lines, "lumyn_llm_requests_total", "LLM calls completed.", self.calls)
+            _counter(lines, "lumyn_llm_errors_total", "LLM calls that raised.", self.errors)
+            _counter(lines, "lumyn_llm_tokens_total", "LLM tokens by type.", self.tokens, extra_label="type")
+            _histogram(lines, "lumyn_llm_request_duration_seconds", "LLM call latency.", self.latency)
+            _histogram(lines, "lumyn_llm_time_to_first_token_seconds", "Time to the first streamed token.", self.ttft)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(key: tuple, extra_label: Optional[str] = None, extra: Optional[Tuple[str, str]] = None) -> str:
+    names = LABELS + ((extra_label,) if extra_label else ())
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, key)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _counter(lines: list, name: str, help: str, values: Dict[tuple, int], extra_label: Optional[str] = None):
+    lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+    for key in sorted(values):
+        lines.append(f"{name}{_labels(key, extra_label)} {values[key]}")
+
+
+def _histogram(lines: list, name: str, help: str, histograms: Dict[tuple, Histogram]):
+    lines += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for key in sorted(histograms):
+        histogram = histograms[key]
+        for bound, count in histogram.cumulative():
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{_labels(key, extra=('le', le))} {count}")
+        lines.append(f"{name}_sum{_labels(key)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+
+
+LLM_METRICS = LLMMetrics()
+
+# Call-site label for the CrewAI agent LLM calls, which do not go through LiteLLMBackend.
+AGENT_CALL_SITE = "agent"
+
+
+def agent_metrics_callback(kwargs, completion_response, start_time, end_time):
+    """litellm success callback recording latency, TTFT and tokens of the agent LLM calls."""
+    if is_tool_call(kwargs):
+        return
+    ttft = None
+    first_token_time = kwargs.get("completion_start_time")
+    if kwargs.get("stream") and first_token_time is not None:
+        ttft = (first_token_time - start_time).total_seconds()
+    usage = extract_usage(getattr(completion_response, "usage", None))
+    LLM_METRICS.observe(AGENTS_SOURCE, AGENT_CALL_SITE, kwargs.get("model"), (end_time - start_time).total_seconds(), ttft=ttft, usage=usage)
+
+
+def agent_failure_metrics_callback(kwargs, completion_response, start_time, end_time):
+    if not is_tool_call(kwargs):
+        LLM_METRICS.observe_error(AGENTS_SOURCE, AGENT_CALL_SITE, kwargs.get("model"))
+
+
+def start_metrics_server(port: int, registry: LLMMetrics = LLM_METRICS, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve the registry at /metrics (Prometheus text) and /metrics.json from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, content_type = json.dumps(registry.snapshot()).encode("utf-8"), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, content_type = registry.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="llm-metrics", daemon=True).start()
+    logger.info(f"Serving LLM metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,198 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import email.utils
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter():
+    """
+    Client-side token bucket on requests/minute and tokens/minute shared by all LLM traffic.
+
+    Callers are admitted strictly in arrival order, so a large request cannot be
+    starved by a stream of small ones. A limit of 0 disables that bucket.
+    `pause` stops admissions for a while, e.g. for a provider's Retry-After.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0, clock=time.monotonic):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._request_budget = float(requests_per_minute)
+        self._token_budget = float(tokens_per_minute)
+        self._last_refill = clock()
+        self._paused_until = 0.0
+        self.admitted = 0
+        self.throttled = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        return cls(requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", 0)),
+                   tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", 0)))
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests_per_minute > 0 or self.tokens_per_minute > 0
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_minute:
+            self._request_budget = min(self.requests_per_minute, self._request_budget + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._token_budget = min(self.tokens_per_minute, self._token_budget + elapsed * self.tokens_per_minute / 60)
+
+    def _delay(self, now: float, tokens: float) -> float:
+        """Seconds until a request of `tokens` could be admitted, 0 if it can be now."""
+        delay = max(0.0, self._paused_until - now)
+        if self.requests_per_minute and self._request_budget < 1:
+            delay = max(delay, (1 - self._request_budget) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute:
+            # A request larger than the whole bucket is admitted once the bucket is full.
+            needed = min(tokens, self.tokens_per_minute)
+            if self._token_budget < needed:
+                delay = max(delay, (needed - self._token_budget) * 60 / self.tokens_per_minute)
+        return delay
+
+    def acquire(self, tokens: float = 0) -> float:
+        """Block until the request may be sent; returns the seconds spent queued."""
+        if not self.enabled and self._paused_until <= self._clock():
+            return 0.0
+        ticket = object()
+        start = self._clock()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    now = self._clock()
+                    self._refill(now)
+                    delay = self._delay(now, tokens)
+                    if self._queue[0] is ticket and delay <= 0:
+                        break
+                    self._cond.wait(timeout=delay if self._queue[0] is ticket else None)
+                if self.requests_per_minute:
+                    self._request_budget -= 1
+                if self.tokens_per_minute:
+                    self._token_budget -= tokens
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+            waited = self._clock() - start
+            self.admitted += 1
+            self.wait_seconds_total += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        if waited > 0.05:
+            logger.info(f"RateLimiter: request queued for {waited:.2f}s")
+        return waited
+
+    def settle(self, estimated_tokens: float, actual_tokens: float):
+        """Correct the token bucket once the real usage of an admitted request is known."""
+        if not self.tokens_per_minute:
+            return
+        with self._cond:
+            self._token_budget -= actual_tokens - estimated_tokens
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        with self._cond:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+            self._cond.notify_all()
+        logger.warning(f"RateLimiter: provider rate limit hit, pausing all LLM requests for {seconds:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "admitted": self.admitted,
+                "throttled": self.throttled,
+                "queued": len(self._queue),
+                "wait_seconds_total": round(self.wait_seconds_total, 3),
+                "max_wait_seconds": round(self.max_wait_seconds, 3),
+            }
+
+
+def retry_after_seconds(error: Any, default: Optional[float] = None) -> Optional[float]:
+    """Read Retry-After (seconds or HTTP date) or retry-after-ms from a rate limit error's response."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or getattr(error, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, AttributeError):
+        pass
+    return default
+
+
+def estimate_tokens(messages: Any) -> int:
+    """Cheap prompt size estimate (4 characters/token) used to reserve tokens before a call."""
+    return len(str(messages)) // 4
+
+
+_RATE_LIMITER: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _RATE_LIMITER
+    with _rate_limiter_lock:
+        if _RATE_LIMITER is None:
+            _RATE_LIMITER = RateLimiter.from_env()
+        return _RATE_LIMITER
+
+
+def make_litellm_rate_limit_callback(limiter: RateLimiter):
+    """
+    litellm callback that puts calls made outside LiteLLMBackend (the CrewAI agent
+    LLMs) through the same limiter, and pauses it when the provider returns 429.
+    """
+    from litellm.integrations.custom_logger import CustomLogger
+
+    from .usage import extract_usage, is_tool_call
+
+    class RateLimitCallback(CustomLogger):
+        def log_pre_api_call(self, model, messages, kwargs):
+            if not is_tool_call(kwargs):
+                kwargs.setdefault("lumyn_estimated_tokens", estimate_tokens(messages))
+                limiter.acquire(kwargs["lumyn_estimated_tokens"])
+
+        def log_success_event(self, kwargs, response_obj, start_time, end_time):
+            if not is_tool_call(kwargs):
+                usage = extract_usage(getattr(response_obj, "usage", None))
+                limiter.settle(kwargs.get("lumyn_estimated_tokens", 0), usage["prompt_tokens"] + usage["completion_tokens"])
+
+        def log_failure_event(self, kwargs, response_obj, start_time, end_time):
+            error = kwargs.get("exception")
+            if not is_tool_call(kwargs) and getattr(error, "status_code", None) == 429:
+                limiter.pause(retry_after_seconds(error, default=5.0))
+
+    return RateLimitCallback()
@@ -0,0 +1,78 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class BackendRegistry():
+    """
+    Process-wide registry that hands out one shared backend per (kind, configuration).
+
+    Backends are created lazily on first request and are safe to share across
+    tools, agents and threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backends: Dict[Any, Any] = {}
+
+    def get(self, kind: str, factory: Callable[..., Any], **overrides) -> Any:
+        key = (kind, json.dumps(overrides, sort_keys=True, default=str))
+        with self._lock:
+            backend = self._backends.get(key)
+            if backend is None:
+                backend = factory(**overrides)
+                self._backends[key] = backend
+                logger.info(f"Created shared {kind} LLM backend ({len(self._backends)} in registry)")
+            return backend
+
+    def clear(self):
+        with self._lock:
+            self._backends.clear()
+
+
+BACKEND_REGISTRY = BackendRegistry()
+
+_http_client_lock = threading.Lock()
+
+
+def configure_shared_http_client():
+    """
+    Give litellm pooled keep-alive HTTP clients, one for completion and one for
+    acompletion, so calls reuse TCP/TLS connections.
+    """
+    import httpx
+    import litellm
+
+    with _http_client_lock:
+        if litellm.client_session is not None and litellm.aclient_session is not None:
+            return
+        pool_size = int(os.getenv("LLM_HTTP_POOL_SIZE", 20))
+        limits = httpx.Limits(max_connections=pool_size,
+                              max_keepalive_connections=pool_size,
+                              keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", 60)))
+        timeout = httpx.Timeout(float(os.getenv("LLM_HTTP_TIMEOUT", 600)))
+        if litellm.client_session is None:
+            litellm.client_session = httpx.Client(limits=limits, timeout=timeout)
+        if litellm.aclient_session is None:
+            litellm.aclient_session = httpx.AsyncClient(limits=limits, timeout=timeout)
+        logger.info(f"Configured shared LLM HTTP clients with pools of {pool_size} connections")
@@ -0,0 +1,108 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+from crewai.llms.base_llm import BaseLLM
+
+from .cassette import REPLAY, Cassette, completion_from_dict, completion_to_dict
+from .litellm_backend import LiteLLMBackend
+from .usage import AGENTS_SOURCE, TOOLS_SOURCE, record_usage
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _system_prompt(messages: Union[str, List[Dict[str, Any]]]) -> Any:
+    if isinstance(messages, list) and messages:
+        return messages[0].get("content")
+    return messages
+
+
+class ReplayLLMBackend(LiteLLMBackend):
+    """
+    LiteLLMBackend that writes every completion to a cassette (record mode) or
+    answers from one without touching the network (replay mode).
+
+    The response cache and streaming are turned off so that a recording holds
+    every call and replays follow the same code path.
+    """
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        kwargs.update(cache=None, stream=False)
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def _cassette_keys(self, kwargs: Dict[str, Any]):
+        return self._cache_key(kwargs), Cassette.make_key(_system_prompt(kwargs["messages"]))
+
+    def _complete(self, kwargs: Dict[str, Any]):
+        key, group = self._cassette_keys(kwargs)
+        if self.cassette.mode == REPLAY:
+            completion = completion_from_dict(self.cassette.replay(TOOLS_SOURCE, key, group))
+            record_usage(TOOLS_SOURCE, completion.usage)
+            return completion
+        completion = super()._complete(kwargs)
+        self.cassette.record(TOOLS_SOURCE, key, group,
+                             {"model": kwargs["model"], "messages": kwargs["messages"], "tools": kwargs.get("tools")},
+                             completion_to_dict(completion))
+        return completion
+
+    async def _acomplete(self, kwargs: Dict[str, Any]):
+        if self.cassette.mode == REPLAY:
+            return self._complete(kwargs)
+        key, group = self._cassette_keys(kwargs)
+        completion = await super()._acomplete(kwargs)
+        self.cassette.record(TOOLS_SOURCE, key, group,
+                             {"model": kwargs["model"], "messages": kwargs["messages"], "tools": kwargs.get("tools")},
+                             completion_to_dict(completion))
+        return completion
+
+
+class CassetteAgentLLM(BaseLLM):
+    """
+    CrewAI LLM for the agents that records the wrapped LLM's answers to a
+    cassette, or replays them when no LLM is wrapped.
+
+    Native function calling is reported as unsupported in both modes, so CrewAI
+    runs the tools itself and a replay exercises the same tool code as the
+    recording.
+    """
+
+    def __init__(self, cassette: Cassette, model: str, inner: Optional[BaseLLM] = None, temperature: Optional[float] = None):
+        super().__init__(model=model, temperature=temperature)
+        self.cassette = cassette
+        self.inner = inner
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        key = Cassette.make_key({"model": self.model, "messages": messages})
+        group = Cassette.make_key(_system_prompt(messages))
+        if self.cassette.mode == REPLAY:
+            return self.cassette.replay(AGENTS_SOURCE, key, group)["content"]
+        response = self.inner.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions, **kwargs)
+        self.cassette.record(AGENTS_SOURCE, key, group, {"model": self.model, "messages": messages}, {"content": response})
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words() if self.inner is not None else True
+
+    def get_context_window_size(self) -> int:
+        if self.inner is not None:
+            return self.inner.get_context_window_size()
+        return super().get_context_window_size()
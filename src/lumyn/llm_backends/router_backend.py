@@ -0,0 +1,186 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Weight of the error rate in an endpoint's score: a 25% error rate doubles its effective latency.
+ERROR_PENALTY = 4.0
+# Size of the pool that runs hedged calls, two threads per in-flight hedged request.
+HEDGE_WORKERS = 16
+
+
+class EndpointStats():
+    """EWMA latency and error rate of one endpoint, plus a window of recent latencies for the p95."""
+
+    def __init__(self, alpha: float = 0.2, window: int = 100, min_samples: int = 20):
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_success(self, seconds: float):
+        with self._lock:
+            self.calls += 1
+            self._samples.append(seconds)
+            self.latency = seconds if self.latency is None else self.alpha * seconds + (1 - self.alpha) * self.latency
+            self.error_rate = (1 - self.alpha) * self.error_rate
+
+    def record_error(self):
+        with self._lock:
+            self.calls += 1
+            self.errors += 1
+            self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+
+    def score(self, penalty_latency: float) -> float:
+        # Untried endpoints score 0 so that each one gets tried. One that has only
+        # failed has no latency of its own and is scored at `penalty_latency`.
+        with self._lock:
+            if self.latency is None:
+                if not self.errors:
+                    return 0.0
+                return penalty_latency * (1 + ERROR_PENALTY * self.error_rate)
+            return self.latency * (1 + ERROR_PENALTY * self.error_rate)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            samples = sorted(self._samples)
+        return samples[int(0.95 * (len(samples) - 1))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "ewma_latency": round(self.latency, 3) if self.latency is not None else None,
+                "error_rate": round(self.error_rate, 4),
+                "p95_latency": round(p95, 3) if p95 is not None else None,
+            }
+
+
+class RouterLLMBackend():
+    """
+    LiteLLMBackend-compatible backend that spreads tool calls over several
+    equivalent deployments.
+
+    Each call goes to the endpoint with the lowest EWMA latency, weighted by its
+    error rate, and fails over to the next endpoint on error. With hedging on,
+    a duplicate request goes to the runner-up once the first endpoint has taken
+    longer than its observed p95, and whichever answer arrives first is used.
+    """
+
+    def __init__(self, backends: List[Any], names: Optional[List[str]] = None, hedge: bool = False,
+                 alpha: float = 0.2, hedge_min_samples: int = 20, timeout: float = 600.0):
+        if not backends:
+            raise ValueError("RouterLLMBackend needs at least one endpoint.")
+        self.backends = backends
+        self.names = names or [f"{b.provider}/{b.model_name}@{b.url}" for b in backends]
+        self.stats = [EndpointStats(alpha=alpha, min_samples=hedge_min_samples) for _ in backends]
+        self.hedge = hedge
+        self.timeout = timeout
+        self.hedges = 0
+        self._lock = threading.Lock()
+        # Hedged calls run on this pool so the caller can wait on two endpoints at once.
+        self._executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+
+    def inference(self, *args, **kwargs) -> Any:
+        return self._dispatch("inference", args, kwargs)
+
+    async def ainference(self, *args, **kwargs) -> Any:
+        return await asyncio.to_thread(self._dispatch, "inference", args, kwargs)
+
+    def inference_until_fence(self, *args, **kwargs) -> str:
+        return self._dispatch("inference_until_fence", args, kwargs)
+
+    def fit_to_budget(self, payload: Any, budget: Optional[int] = None) -> str:
+        return self.backends[0].fit_to_budget(payload, budget)
+
+    def endpoint_stats(self) -> Dict[str, Any]:
+        return {"hedges": self.hedges, "endpoints": {name: stats.snapshot() for name, stats in zip(self.names, self.stats)}}
+
+    def _ranked(self) -> List[int]:
+        # Endpoints that have never succeeded are penalised with the worst latency seen anywhere, or the request timeout.
+        penalty_latency = max((stats.latency for stats in self.stats if stats.latency is not None), default=self.timeout)
+        scores = [stats.score(penalty_latency) for stats in self.stats]
+        return sorted(range(len(self.backends)), key=lambda index: scores[index])
+
+    def _call(self, index: int, method: str, args: tuple, kwargs: dict) -> Any:
+        start = time.monotonic()
+        try:
+            result = getattr(self.backends[index], method)(*args, **kwargs)
+        except Exception:
+            self.stats[index].record_error()
+            raise
+        self.stats[index].record_success(time.monotonic() - start)
+        return result
+
+    def _dispatch(self, method: str, args: tuple, kwargs: dict) -> Any:
+        order = self._ranked()
+        tried = set()
+        error = None
+        for index in order:
+            if index in tried:
+                continue
+            runner_up = next((other for other in order if other != index and other not in tried), None)
+            try:
+                if self.hedge and runner_up is not None:
+                    return self._hedged(index, runner_up, method, args, kwargs, tried)
+                tried.add(index)
+                return self._call(index, method, args, kwargs)
+            except Exception as e:
+                logger.warning(f"LLM endpoint {self.names[index]} failed, trying the next endpoint: {e}")
+                error = e
+        raise error
+
+    def _hedged(self, primary: int, secondary: int, method: str, args: tuple, kwargs: dict, tried: set) -> Any:
+        tried.add(primary)
+        first = self._executor.submit(self._call, primary, method, args, kwargs)
+        delay = self.stats[primary].p95()
+        if delay is None:
+            return first.result()
+        try:
+            return first.result(timeout=delay)
+        except FuturesTimeout:
+            pass
+
+        with self._lock:
+            self.hedges += 1
+        tried.add(secondary)
+        logger.info(f"LLM endpoint {self.names[primary]} slower than its p95 ({delay:.2f}s), hedging to {self.names[secondary]}")
+        pending = {first, self._executor.submit(self._call, secondary, method, args, kwargs)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
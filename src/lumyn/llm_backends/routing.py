@@ -0,0 +1,88 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import yaml
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Route settings that point a call site at another deployment, with its own credentials.
+CONNECTION_KEYS = ("provider", "url", "api_key", "api_version", "extra_headers")
+# Per-call-site settings a route may override on LiteLLMBackend.
+ROUTE_KEYS = CONNECTION_KEYS + ("model", "max_tokens", "thinking_budget", "reasoning_effort", "temperature")
+
+# Call sites used by the tools, for reference when writing a routes file.
+CALL_SITES = (
+    "nl2kubectl.generate",
+    "nl2kubectl.summarize",
+    "nl2metrics.generate",
+    "nl2metrics.summarize",
+    "nl2traces.generate",
+    "nl2traces.summarize",
+    "remediation.plan",
+    "report.diagnosis",
+    "report.remediation",
+    "report.code",
+)
+
+
+def load_routes() -> Dict[str, Dict[str, Any]]:
+    """
+    Load the call-site routing table.
+
+    Routes are read from the YAML file named by LLM_ROUTES_FILE, then from the
+    JSON object in LLM_ROUTES, which takes precedence per call site, e.g.
+    LLM_ROUTES='{"report": {"model": "gpt-4o-mini", "max_tokens": 2000}}'.
+    """
+    routes: Dict[str, Dict[str, Any]] = {}
+    routes_file = os.getenv("LLM_ROUTES_FILE")
+    if routes_file:
+        with open(routes_file, "r") as f:
+            routes.update(yaml.safe_load(f) or {})
+    if os.getenv("LLM_ROUTES"):
+        routes.update(json.loads(os.environ["LLM_ROUTES"]))
+
+    for call_site, route in routes.items():
+        unknown = set(route) - set(ROUTE_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown LLM route settings for {call_site}: {sorted(unknown)}. Valid settings are {list(ROUTE_KEYS)}.")
+    if routes:
+        logger.info(f"Loaded LLM routes for call sites: {sorted(routes)}")
+    return routes
+
+
+def resolve_route(routes: Dict[str, Dict[str, Any]], call_site: Optional[str]) -> Dict[str, Any]:
+    """Most specific route for a dotted call site: `report.diagnosis`, then `report`, then `default`."""
+    if call_site:
+        parts = call_site.split(".")
+        for i in range(len(parts), 0, -1):
+            route = routes.get(".".join(parts[:i]))
+            if route is not None:
+                return route
+    return routes.get("default", {})
+
+
+def endpoint_kwargs(provider: str, model: str, url: str, api_key: str, api_version: str = "", extra_headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """LiteLLMBackend connection arguments for one deployment, translating the rits provider."""
+    if provider.lower() == "rits":
+        return dict(provider="openai", model_name=model, url=url.rstrip("/"), api_key="API_KEY", api_version=api_version,
+                    extra_headers={'RITS_API_KEY': api_key})
+    return dict(provider=provider, model_name=model, url=url.rstrip("/"), api_key=api_key, api_version=api_version,
+                extra_headers=extra_headers)
@@ -0,0 +1,141 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import copy
+import json
+from typing import Any, Callable, Optional, Tuple
+
+# Span tags worth keeping once tags have to go: they carry the error and status signal.
+IMPORTANT_TAG_MARKERS = ("error", "status", "exception", "http.method", "http.url", "rpc.")
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count tokens locally with litellm's tokenizer, falling back to a 4 characters/token estimate."""
+    try:
+        import litellm
+        return litellm.token_counter(model=model or "", text=text)
+    except Exception:
+        return max(1, len(text) // 4)
+
+
+def _walk(node: Any, visit: Callable[[Any], None]):
+    visit(node)
+    if isinstance(node, dict):
+        for value in node.values():
+            _walk(value, visit)
+    elif isinstance(node, list):
+        for value in node:
+            _walk(value, visit)
+
+
+def _drop_keys(*keys: str) -> Callable[[Any], None]:
+    def visit(node):
+        if isinstance(node, dict):
+            for key in keys:
+                node.pop(key, None)
+    return visit
+
+
+def _collapse_processes(node: Any):
+    # Jaeger repeats host/ip/library tags in every process entry; the service name is what matters.
+    if isinstance(node, dict) and isinstance(node.get("processes"), dict):
+        node["processes"] = {
+            process_id: {"serviceName": process.get("serviceName")} if isinstance(process, dict) else process
+            for process_id, process in node["processes"].items()
+        }
+
+
+def _keep_important_tags(node: Any):
+    if isinstance(node, dict) and isinstance(node.get("tags"), list):
+        node["tags"] = [
+            tag for tag in node["tags"]
+            if isinstance(tag, dict) and any(marker in str(tag.get("key", "")).lower() for marker in IMPORTANT_TAG_MARKERS)
+        ]
+
+
+# Applied in order until the payload fits: cheapest information first.
+REDUCTIONS = [
+    _drop_keys("warnings", "flags"),
+    _collapse_processes,
+    _drop_keys("logs"),
+    _keep_important_tags,
+    _drop_keys("references"),
+]
+
+
+def _is_marker(value: Any) -> bool:
+    return isinstance(value, dict) and set(value) == {"truncated_items"}
+
+
+def _items(values: list) -> int:
+    return len(values) - 1 if values and _is_marker(values[-1]) else len(values)
+
+
+def _longest_list(node: Any) -> Optional[list]:
+    longest = None
+
+    def visit(value):
+        nonlocal longest
+        if isinstance(value, list) and _items(value) > 1 and (longest is None or _items(value) > _items(longest)):
+            longest = value
+    _walk(node, visit)
+    return longest
+
+
+def _halve(values: list):
+    dropped = values.pop()["truncated_items"] if values and _is_marker(values[-1]) else 0
+    keep = len(values) // 2
+    dropped += len(values) - keep
+    del values[keep:]
+    values.append({"truncated_items": dropped})
+
+
+def trim_payload(payload: Any, budget: int, counter: Callable[[str], int] = count_tokens) -> Tuple[str, int, int]:
+    """
+    Serialize `payload` to JSON within `budget` tokens. Text payloads (e.g. a
+    digest already rendered for the model) are kept as they are.
+
+    Low-value fields are removed first (warnings, repeated Jaeger process tags,
+    span logs, non-error tags, references), then the longest lists are halved,
+    and as a last resort the text is cut. Returns (text, original_tokens, final_tokens).
+    """
+    text = payload if isinstance(payload, str) else json.dumps(payload)
+    original_tokens = tokens = counter(text)
+    if tokens <= budget or not isinstance(payload, (dict, list)):
+        if tokens > budget:
+            text = text[:max(1, len(text) * budget // tokens)]
+            tokens = counter(text)
+        return text, original_tokens, tokens
+
+    trimmed = copy.deepcopy(payload)
+    for reduction in REDUCTIONS:
+        _walk(trimmed, reduction)
+        text = json.dumps(trimmed)
+        tokens = counter(text)
+        if tokens <= budget:
+            return text, original_tokens, tokens
+
+    while tokens > budget:
+        longest = _longest_list(trimmed)
+        if longest is None:
+            break
+        _halve(longest)
+        text = json.dumps(trimmed)
+        tokens = counter(text)
+
+    if tokens > budget:
+        text = text[:max(1, len(text) * budget // tokens)]
+        tokens = counter(text)
+    return text, original_tokens, tokens
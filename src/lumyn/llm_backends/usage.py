@@ -0,0 +1,98 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Set in the litellm metadata of tool calls so the agent-side callback does not count them twice.
+TOOLS_SOURCE = "tools"
+AGENTS_SOURCE = "agents"
+
+
+def _get(obj: Any, name: str):
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def extract_usage(usage: Any) -> Dict[str, int]:
+    """Normalise an OpenAI- or Anthropic-style litellm usage block into plain token counts."""
+    cached_tokens = _get(_get(usage, "prompt_tokens_details"), "cached_tokens") or _get(usage, "cache_read_input_tokens")
+    return {
+        "prompt_tokens": _get(usage, "prompt_tokens") or 0,
+        "completion_tokens": _get(usage, "completion_tokens") or 0,
+        "cached_tokens": cached_tokens or 0,
+        "cache_creation_tokens": _get(usage, "cache_creation_input_tokens") or 0,
+        "reasoning_tokens": _get(_get(usage, "completion_tokens_details"), "reasoning_tokens") or 0,
+    }
+
+
+class UsageTotals():
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.tokens = defaultdict(int)
+
+    def add(self, usage: Dict[str, int]):
+        with self._lock:
+            self.calls += 1
+            for name, count in usage.items():
+                self.tokens[name] += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {"calls": self.calls, **self.tokens}
+        prompt_tokens = snapshot.get("prompt_tokens", 0)
+        snapshot["cache_hit_rate"] = round(snapshot.get("cached_tokens", 0) / prompt_tokens, 4) if prompt_tokens else 0.0
+        return snapshot
+
+
+USAGE_TOTALS = {
+    TOOLS_SOURCE: UsageTotals(),
+    AGENTS_SOURCE: UsageTotals(),
+}
+
+
+def record_usage(source: str, usage: Any) -> Dict[str, int]:
+    counts = extract_usage(usage)
+    USAGE_TOTALS[source].add(counts)
+    logger.info(f"LLM usage ({source}): {counts}")
+    return counts
+
+
+def is_tool_call(kwargs) -> bool:
+    """Whether the kwargs litellm hands its callbacks belong to a LiteLLMBackend (tool) call rather than an agent call."""
+    metadata = (kwargs.get("litellm_params") or {}).get("metadata") or kwargs.get("metadata") or {}
+    return metadata.get("lumyn_source") == TOOLS_SOURCE
+
+
+def agent_usage_callback(kwargs, completion_response, start_time, end_time):
+    """litellm success callback that records usage for calls not made by LiteLLMBackend (i.e. the CrewAI agents)."""
+    if is_tool_call(kwargs):
+        return
+    usage = _get(completion_response, "usage")
+    if usage is not None:
+        record_usage(AGENTS_SOURCE, usage)
+
+
+def usage_summary() -> Dict[str, Dict[str, Any]]:
+    return {source: totals.snapshot() for source, totals in USAGE_TOTALS.items()}
@@ -22,10 +22,14 @@ import time
 import subprocess
 
 from lumyn.crew import LumynCrew
+from lumyn.tools.observability_stack.alert_watcher import AlertWatcher, poll_with_backoff
 from lumyn.tools.observability_stack.get_alerts import GetAlertsCustomTool
 from lumyn.tools.kubectl.nl2kubectl import NL2KubectlCustomTool
-from lumyn.tools.observability_stack.get_topology_nodes import GetTopologyNodes
+from lumyn.tools.observability_stack.get_topology_nodes import TOPOLOGY_SNAPSHOT, GetTopologyNodes
 from lumyn.llm_backends.init_backend import (get_llm_backend_for_tools)
+from lumyn.llm_backends.metrics import LLM_METRICS, start_metrics_server
+from lumyn.llm_backends.rate_limiter import get_rate_limiter
+from lumyn.llm_backends.usage import usage_summary
 
 from collections import defaultdict
 
@@ -125,27 +129,22 @@ def run():
     if kubectl_otel_astronomy_shop[1] != 0:
         raise Exception("KUBECONFIG is not configured correctly.")
 
-    while True:
-        alerts = GetAlertsCustomTool()._run()
-        if alerts is not None and len(alerts) > 0:
-            break
-
-    while True:
-        nodes = GetTopologyNodes()._run()
-        if nodes is not None:
-            with open(
-                    os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                 "tools", "report_generation", "data",
-                                 "topology_nodes.json"), "w") as f:
-                json.dump(nodes, f)
-            if "STRUCTURED_UNSTRUCTURED_OUTPUT_DIRECTORY_PATH" in os.environ:
-                with open(
-                        os.path.join(
-                            os.getenv(
-                                "STRUCTURED_UNSTRUCTURED_OUTPUT_DIRECTORY_PATH"
-                            ), "topology_nodes.json"), "w") as f:
-                    json.dump(nodes, f)
-            break
+    # Poll with backoff instead of spinning; ALERT_WAIT_TIMEOUT bounds the wait.
+    alert_watcher = AlertWatcher.from_env(GetAlertsCustomTool().fetch_alerts)
+    alerts = alert_watcher.wait_for_alerts()
+
+    nodes = poll_with_backoff(GetTopologyNodes()._run, lambda nodes: nodes is not None, what="topology nodes",
+                              **alert_watcher.backoff_settings())
+    # GetTopologyNodes returns the document held by TOPOLOGY_SNAPSHOT, which
+    # only rewrites the files when the topology digest changed.
+    if nodes is None or nodes is not TOPOLOGY_SNAPSHOT.nodes:
+        raise Exception("Topology nodes could not be retrieved.")
+    TOPOLOGY_SNAPSHOT.save()
+    if "STRUCTURED_UNSTRUCTURED_OUTPUT_DIRECTORY_PATH" in os.environ:
+        TOPOLOGY_SNAPSHOT.save(
+            os.path.join(
+                os.getenv("STRUCTURED_UNSTRUCTURED_OUTPUT_DIRECTORY_PATH"),
+                "topology_nodes.json"))
 
     inputs = {
         "alerts": alerts
@@ -164,6 +163,9 @@ def run():
     with open(os.path.join(eval_dir, 'alert_start_time.txt'), 'w') as f:
         f.write(datetime.datetime.now().isoformat())
 
+    if os.getenv("LLM_METRICS_PORT"):
+        start_metrics_server(int(os.environ["LLM_METRICS_PORT"]))
+
     CrewAIInstrumentor().instrument(skip_dep_check=True)
     LangChainInstrumentor().instrument(skip_dep_check=True)
     LiteLLMInstrumentor().instrument(skip_dep_check=True)
@@ -173,6 +175,13 @@ def run():
     with langfuse.start_as_current_observation(as_type="span", name="crewai-index-trace"):
         LumynCrew().crew().kickoff(inputs=inputs)
         # LumynCrew(callback_agent=loop_detector.callback).crew().kickoff(inputs=inputs)
+    print(f"LLM token usage (cached_tokens shows prompt cache hits): {json.dumps(usage_summary())}")
+    print(f"LLM rate limiter (queue time in seconds): {json.dumps(get_rate_limiter().stats())}")
+    tools_backend = get_llm_backend_for_tools()
+    if hasattr(tools_backend, "endpoint_stats"):
+        print(f"LLM endpoint routing for tools: {json.dumps(tools_backend.endpoint_stats())}")
+    with open(os.path.join(eval_dir, 'llm_metrics.json'), 'w') as f:
+        json.dump(LLM_METRICS.snapshot(), f, indent=4)
     langfuse.flush()
     time.sleep(15)   
     traces = langfuse.api.trace.list()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from lumyn.llm_backends import litellm_backend
+from lumyn.llm_backends.litellm_backend import LiteLLMBackend
+from lumyn.llm_backends.response_cache import ResponseCache
+
+
+def completion(content=None, tool_call=None):
+    if tool_call is not None:
+        name, arguments = tool_call
+        message = SimpleNamespace(content=None, tool_calls=[SimpleNamespace(function=SimpleNamespace(name=name, arguments=arguments))])
+        finish_reason = "tool_calls"
+    else:
+        message = SimpleNamespace(content=content, tool_calls=None)
+        finish_reason = "stop"
+    usage = {"prompt_tokens": 50, "completion_tokens": 5}
+    return SimpleNamespace(choices=[SimpleNamespace(finish_reason=finish_reason, message=message)], usage=usage)
+
+
+class TestAInference(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.limiter = mock.Mock()
+        self.backend = LiteLLMBackend(provider="openai", model_name="test", url="", api_key="", api_version="",
+                                      seed=10, top_p=0.95, temperature=0.0, reasoning_effort="",
+                                      thinking_tools="", thinking_budget_tools=0, max_tokens=100,
+                                      cache=ResponseCache(path=os.path.join(self.tmp_dir.name, "cache.sqlite")),
+                                      rate_limiter=self.limiter)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def ainference(self, response, *args, **kwargs):
+        with mock.patch.object(litellm_backend.litellm, "acompletion", new=mock.AsyncMock(return_value=response)) as acompletion:
+            result = await self.backend.ainference(*args, **kwargs)
+        return result, acompletion
+
+    async def test_text_response(self):
+        result, acompletion = await self.ainference(completion("kubectl get pods"), "s", "list pods")
+        self.assertEqual(result, "kubectl get pods")
+        self.assertEqual(acompletion.await_args.kwargs["model"], "openai/test")
+        self.limiter.acquire.assert_called_once()
+        self.limiter.settle.assert_called_once()
+
+    async def test_tool_call_response(self):
+        tools = [{"type": "function", "function": {"name": "get_pods", "parameters": {}}}]
+        result, acompletion = await self.ainference(completion(tool_call=("get_pods", '{"namespace": "otel-demo"}')), "s", "list pods", tools)
+        self.assertEqual(result, ("get_pods", {"namespace": "otel-demo"}))
+        self.assertEqual(acompletion.await_args.kwargs["tools"], tools)
+
+    async def test_cache_hit_skips_the_call(self):
+        await self.ainference(completion("kubectl get pods"), "s", "list pods")
+        result, acompletion = await self.ainference(completion("something else"), "s", "list pods")
+        self.assertEqual(result, "kubectl get pods")
+        acompletion.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
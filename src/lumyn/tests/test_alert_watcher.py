@@ -0,0 +1,82 @@
+import unittest
+
+from lumyn.tools.observability_stack.alert_watcher import CHANGED, NEW, RESOLVED, AlertWatcher, alert_fingerprint, diff_alerts, poll_with_backoff, summarize_alert_events
+
+
+def alert(name, pod="cart-1", active_at="2025-01-01T00:00:00Z", value="1"):
+    return {"labels": {"alertname": name, "pod": pod}, "annotations": {"summary": name}, "state": "firing", "activeAt": active_at, "value": value}
+
+
+class FakeTime():
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestAlertWatcher(unittest.TestCase):
+    def test_fingerprint_ignores_value_and_label_order(self):
+        first = alert("HighLatency", value="0.9")
+        second = {**alert("HighLatency", value="1.2"), "labels": {"pod": "cart-1", "alertname": "HighLatency"}}
+        self.assertEqual(alert_fingerprint(first), alert_fingerprint(second))
+        self.assertNotEqual(alert_fingerprint(first), alert_fingerprint(alert("HighLatency", pod="cart-2")))
+
+    def test_annotations_rendered_from_value_are_not_changes(self):
+        known, _ = diff_alerts({}, [alert("A", value="0.9")])
+        moved = {**alert("A", value="1.2"), "annotations": {"summary": "latency is 1.2s"}}
+        _, events = diff_alerts(known, [moved])
+        self.assertEqual(events, [])
+
+    def test_diff_alerts(self):
+        known, events = diff_alerts({}, [alert("A"), alert("B")])
+        self.assertEqual([event.kind for event in events], [NEW, NEW])
+        known, events = diff_alerts(known, [alert("A", value="5"), alert("B", active_at="2025-01-01T01:00:00Z"), alert("C")])
+        self.assertEqual(sorted(event.kind for event in events), [CHANGED, NEW])
+        known, events = diff_alerts(known, [alert("C")])
+        self.assertEqual([event.kind for event in events], [RESOLVED, RESOLVED])
+        self.assertEqual(list(known), [alert_fingerprint(alert("C"))])
+
+    def test_summarize_alert_events(self):
+        known, _ = diff_alerts({}, [alert("A"), alert("B")])
+        _, events = diff_alerts(known, [alert("B", active_at="2025-01-01T01:00:00Z"), alert("C")])
+        delta = summarize_alert_events(events, 2)
+        self.assertEqual(delta["summary"], {"firing": 2, NEW: 1, CHANGED: 1, RESOLVED: 1})
+        self.assertEqual(delta[NEW][0]["labels"]["alertname"], "C")
+        self.assertEqual(delta[RESOLVED], [{"fingerprint": alert_fingerprint(alert("A")), "labels": alert("A")["labels"]}])
+        self.assertEqual(summarize_alert_events([], 0), {"summary": {"firing": 0, NEW: 0, CHANGED: 0, RESOLVED: 0}})
+
+    def test_wait_for_alerts_backs_off(self):
+        fake = FakeTime()
+        responses = iter([[], ConnectionError("down"), [], [], [alert("A")]])
+
+        def fetch():
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        watcher = AlertWatcher(fetch, poll_interval=1, max_interval=4, sleep=fake.sleep, clock=fake.clock)
+        self.assertEqual(watcher.wait_for_alerts(), [alert("A")])
+        self.assertEqual(fake.sleeps, [1, 2, 4, 4])
+
+    def test_timeout(self):
+        fake = FakeTime()
+        with self.assertRaises(TimeoutError):
+            poll_with_backoff(lambda: None, lambda result: result is not None, poll_interval=1, timeout=5, sleep=fake.sleep, clock=fake.clock)
+        self.assertLessEqual(fake.now, 5)
+
+    def test_events(self):
+        fake = FakeTime()
+        responses = iter([[alert("A")], [alert("A")], [], []])
+        watcher = AlertWatcher(lambda: next(responses), poll_interval=1, timeout=2.5, sleep=fake.sleep, clock=fake.clock)
+        self.assertEqual([event.kind for event in watcher.events()], [NEW, RESOLVED])
+
+
+if __name__ == "__main__":
+    unittest.main()
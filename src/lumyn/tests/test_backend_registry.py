@@ -0,0 +1,41 @@
+import threading
+import unittest
+
+from lumyn.llm_backends.registry import BackendRegistry
+
+
+class TestBackendRegistry(unittest.TestCase):
+    def test_same_configuration_is_shared(self):
+        registry = BackendRegistry()
+        created = []
+
+        def factory(**overrides):
+            created.append(overrides)
+            return object()
+
+        first = registry.get("tools", factory)
+        self.assertIs(first, registry.get("tools", factory))
+        self.assertIsNot(first, registry.get("tools", factory, max_tokens=100))
+        self.assertIsNot(first, registry.get("agents", factory))
+        self.assertEqual(len(created), 3)
+
+    def test_concurrent_requests_create_one_backend(self):
+        registry = BackendRegistry()
+        created = []
+        results = []
+
+        def factory(**overrides):
+            created.append(1)
+            return object()
+
+        threads = [threading.Thread(target=lambda: results.append(registry.get("tools", factory))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(created), 1)
+        self.assertEqual(len(set(map(id, results))), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
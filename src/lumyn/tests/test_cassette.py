@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from lumyn.llm_backends.cassette import RECORD, REPLAY, Cassette, CassetteMiss, completion_from_dict, completion_to_dict
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_replays_exact_matches_in_recorded_order(self):
+        cassette = Cassette(self.path, RECORD)
+        cassette.record("tools", "k1", "g", {}, {"content": "first"})
+        cassette.record("tools", "k1", "g", {}, {"content": "second"})
+        cassette.close()
+
+        replay = Cassette(self.path, REPLAY)
+        self.assertEqual(replay.replay("tools", "k1", "g")["content"], "first")
+        self.assertEqual(replay.replay("tools", "k1", "g")["content"], "second")
+        with self.assertRaises(CassetteMiss):
+            replay.replay("tools", "k1", "g")
+
+    def test_falls_back_to_same_system_prompt(self):
+        cassette = Cassette(self.path, RECORD)
+        cassette.record("tools", "k1", "g1", {}, {"content": "a"})
+        cassette.record("agents", "k2", "g1", {}, {"content": "agent"})
+        cassette.record("tools", "k3", "g1", {}, {"content": "b"})
+        cassette.close()
+
+        replay = Cassette(self.path, REPLAY)
+        self.assertEqual(replay.replay("tools", "k3", "g1")["content"], "b")
+        self.assertEqual(replay.replay("tools", "changed", "g1")["content"], "a")
+        self.assertEqual(replay.replay("agents", "changed", "g1")["content"], "agent")
+        with self.assertRaises(CassetteMiss):
+            replay.replay("tools", "changed", "g2")
+
+    def test_completion_round_trip(self):
+        function = SimpleNamespace(name="get_traces", arguments='{"service": "frontend"}')
+        message = SimpleNamespace(content=None, tool_calls=[SimpleNamespace(function=function)])
+        completion = SimpleNamespace(choices=[SimpleNamespace(finish_reason="tool_calls", message=message)],
+                                     usage={"prompt_tokens": 10, "completion_tokens": 2})
+        rebuilt = completion_from_dict(completion_to_dict(completion))
+        self.assertEqual(rebuilt.choices[0].finish_reason, "tool_calls")
+        self.assertEqual(rebuilt.choices[0].message.tool_calls[0].function.arguments, '{"service": "frontend"}')
+        self.assertEqual(rebuilt.usage["prompt_tokens"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
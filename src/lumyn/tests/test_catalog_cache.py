@@ -0,0 +1,67 @@
+import threading
+import unittest
+
+from lumyn.tools.observability_stack.catalog_cache import CatalogCache
+
+
+class FakeClock():
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCatalogCache(unittest.TestCase):
+    def test_serves_cached_value_within_ttl(self):
+        clock = FakeClock()
+        cache = CatalogCache(ttl_seconds=60, refresh_after=60, clock=clock)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return frozenset({"frontend"})
+
+        self.assertEqual(cache.get("services", loader), {"frontend"})
+        clock.now = 30
+        self.assertEqual(cache.get("services", loader), {"frontend"})
+        self.assertEqual(len(calls), 1)
+        clock.now = 61
+        cache.get("services", loader)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_background_refresh(self):
+        clock = FakeClock()
+        cache = CatalogCache(ttl_seconds=60, refresh_after=10, clock=clock)
+        cache.get("services", lambda: frozenset({"frontend"}))
+        refreshed = threading.Event()
+
+        def loader():
+            refreshed.set()
+            return frozenset({"frontend", "cart"})
+
+        clock.now = 20
+        # The stale-but-valid value is served immediately while the refresh runs.
+        self.assertEqual(cache.get("services", loader), {"frontend"})
+        self.assertTrue(refreshed.wait(5))
+        for _ in range(100):
+            if cache.stats()["refreshes"]:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(cache.get("services", loader), {"frontend", "cart"})
+
+    def test_failed_load_is_not_cached(self):
+        cache = CatalogCache(ttl_seconds=60)
+        self.assertIsNone(cache.get("services", lambda: None))
+        self.assertEqual(cache.get("services", lambda: frozenset({"cart"})), {"cart"})
+
+    def test_disabled(self):
+        cache = CatalogCache(ttl_seconds=0)
+        values = iter([1, 2])
+        self.assertEqual(cache.get("k", lambda: next(values)), 1)
+        self.assertEqual(cache.get("k", lambda: next(values)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from lumyn.llm_backends import litellm_backend
+from lumyn.llm_backends.litellm_backend import LiteLLMBackend
+from lumyn.llm_backends.rate_limiter import estimate_tokens
+
+
+def chunk(text=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=text))] if text is not None else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class TestInferenceUntilFence(unittest.TestCase):
+    def setUp(self):
+        self.limiter = mock.Mock()
+        self.backend = LiteLLMBackend(provider="openai", model_name="test", url="", api_key="", api_version="",
+                                      seed=10, top_p=0.95, temperature=0.0, reasoning_effort="",
+                                      thinking_tools="", thinking_budget_tools=0, max_tokens=100,
+                                      stream=True, rate_limiter=self.limiter)
+
+    def run_stream(self, chunks):
+        with mock.patch.object(litellm_backend.litellm, "completion", return_value=iter(chunks)) as completion, \
+                mock.patch.object(litellm_backend, "record_usage", wraps=litellm_backend.record_usage) as record_usage:
+            content = self.backend.inference_until_fence("s", "get pods", "bash")
+        return content, completion.call_args.kwargs, record_usage.call_args.args[1]
+
+    def test_settles_with_final_usage_chunk_when_stream_completes(self):
+        usage = {"prompt_tokens": 120, "completion_tokens": 10, "prompt_tokens_details": {"cached_tokens": 64}}
+        content, kwargs, recorded = self.run_stream([chunk("No command "), chunk("needed."), chunk(usage=usage)])
+        self.assertEqual(content, "No command needed.")
+        self.assertEqual(kwargs["stream_options"], {"include_usage": True})
+        self.assertEqual(recorded, usage)
+        self.limiter.settle.assert_called_once_with(estimate_tokens(kwargs["messages"]), 130)
+
+    def test_settles_with_estimate_when_stopped_at_fence(self):
+        content, kwargs, recorded = self.run_stream([chunk("```bash\nkubectl get pods\n```"), chunk(" and some explanation")])
+        self.assertEqual(recorded, {"prompt_tokens": estimate_tokens(kwargs["messages"]), "completion_tokens": estimate_tokens(content)})
+        self.limiter.settle.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+from lumyn.tools.observability_stack import json_stream
+from lumyn.tools.observability_stack.json_stream import CappedStream, ResponseTooLarge, iter_items, read_json
+
+
+class TestJsonStream(unittest.TestCase):
+    def setUp(self):
+        self.body = json.dumps({"data": [{"traceID": f"t{i}", "spans": [{"spanID": "x" * 100}]} for i in range(50)]}).encode("utf-8")
+
+    def test_capped_stream(self):
+        stream = CappedStream(io.BytesIO(b"0123456789"), 4)
+        self.assertEqual(stream.read(3), b"012")
+        self.assertEqual(stream.read(3), b"3")
+        self.assertEqual(stream.read(3), b"")
+        self.assertTrue(stream.exceeded)
+        exact = CappedStream(io.BytesIO(b"0123"), 4)
+        self.assertEqual(exact.read(), b"0123")
+        self.assertEqual(exact.read(), b"")
+        self.assertFalse(exact.exceeded)
+
+    def test_read_whole_body(self):
+        self.assertEqual(read_json(io.BytesIO(self.body), max_bytes=len(self.body)), json.loads(self.body))
+
+    def test_over_cap_without_items_path(self):
+        with self.assertRaises(ResponseTooLarge):
+            read_json(io.BytesIO(self.body), max_bytes=len(self.body) // 2)
+
+    def test_items_are_kept_up_to_the_cap(self):
+        result = read_json(io.BytesIO(self.body), items_path="data", max_bytes=len(self.body) // 2)
+        self.assertIn("truncated", result)
+        self.assertTrue(0 < len(result["data"]) < 50)
+        self.assertEqual(result["data"][0]["traceID"], "t0")
+        full = read_json(io.BytesIO(self.body), items_path="data")
+        self.assertEqual(len(full["data"]), 50)
+        self.assertNotIn("truncated", full)
+
+    def test_iter_items_across_chunks(self):
+        body = json.dumps({"status": "success", "data": {"resultType": "matrix", "skip": {"result": [0]},
+                                                         "result": [{"metric": {"pod": "é"}, "values": [[1, "2"]]}, 12345, -1.5e3, "x"]}})
+        with mock.patch.object(json_stream, "CHUNK_SIZE", 3):
+            items = list(iter_items(io.BytesIO(body.encode("utf-8")), "data.result"))
+        self.assertEqual(items, [{"metric": {"pod": "é"}, "values": [[1, "2"]]}, 12345, -1500.0, "x"])
+        self.assertEqual(list(iter_items(io.BytesIO(b'{"status": "error", "error": "bad"}'), "data.result")), [])
+
+    def test_iter_items_rejects_malformed_body(self):
+        with self.assertRaises(ValueError):
+            list(iter_items(io.BytesIO(b'{"data": [{"a": 1}, {"b":'), "data"))
+
+
+if __name__ == "__main__":
+    unittest.main()
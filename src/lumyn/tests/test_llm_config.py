@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from lumyn.llm_backends import init_backend
+from lumyn.llm_backends.init_backend import LLMConfig
+
+ENV = {
+    "PROVIDER_AGENTS": "openai", "MODEL_AGENTS": "gpt-4o", "URL_AGENTS": "http://agents/", "API_KEY_AGENTS": "a",
+    "PROVIDER_TOOLS": "rits", "MODEL_TOOLS": "llama", "URL_TOOLS": "http://tools", "API_KEY_TOOLS": "t",
+    "SEED_TOOLS": "7", "TEMPERATURE_TOOLS": "0.5", "REASONING_EFFORT_TOOLS": "HIGH", "STREAM_TOOLS": "True",
+}
+
+
+class TestLLMConfig(unittest.TestCase):
+    def test_typed_values_and_defaults(self):
+        with mock.patch.dict(os.environ, ENV, clear=True):
+            config = LLMConfig.from_env()
+        self.assertEqual(config.agents.url, "http://agents")
+        self.assertEqual(config.tools.seed, 7)
+        self.assertEqual(config.tools.temperature, 0.5)
+        self.assertEqual(config.tools.reasoning_effort, "high")
+        self.assertEqual(config.agents.max_tokens, 24000)
+        self.assertTrue(config.stream_tools)
+        self.assertEqual(config.token_budget_tools, 32000)
+
+    def test_missing_required_variable_raises(self):
+        env = {k: v for k, v in ENV.items() if k != "MODEL_TOOLS"}
+        with mock.patch.dict(os.environ, env, clear=True):
+            with self.assertRaises(KeyError):
+                LLMConfig.from_env()
+
+    def test_endpoints(self):
+        with mock.patch.dict(os.environ, {**ENV, "ENDPOINTS_TOOLS": ""}, clear=True):
+            self.assertEqual(LLMConfig.from_env().endpoints_tools, [])
+        with mock.patch.dict(os.environ, {**ENV, "ENDPOINTS_TOOLS": '{"url": "http://a"}'}, clear=True):
+            with self.assertRaises(ValueError):
+                LLMConfig.from_env()
+
+    def test_router_from_endpoints(self):
+        from lumyn.llm_backends.router_backend import RouterLLMBackend
+
+        endpoints = '[{"name": "rits-a", "url": "http://a/", "api_key": "k"}, {"provider": "azure", "model": "gpt-4o", "url": "http://b", "api_version": "2024-12-01-preview"}]'
+        with mock.patch.dict(os.environ, {**ENV, "ENDPOINTS_TOOLS": endpoints}, clear=True):
+            config = LLMConfig.from_env()
+        with mock.patch.object(init_backend, "get_llm_config", return_value=config), \
+                mock.patch.object(init_backend, "configure_shared_http_client"), \
+                mock.patch.object(init_backend, "get_response_cache", return_value=None), \
+                mock.patch.object(init_backend, "get_cassette", return_value=None), \
+                mock.patch("lumyn.llm_backends.litellm_backend.LiteLLMBackend", side_effect=lambda **kwargs: SimpleNamespace(**kwargs)):
+            router = init_backend._create_llm_backend_for_tools()
+        self.assertIsInstance(router, RouterLLMBackend)
+        self.assertEqual(router.names, ["rits-a", "azure/gpt-4o@http://b"])
+        rits, azure = router.backends
+        self.assertEqual((rits.provider, rits.url, rits.extra_headers), ("openai", "http://a", {"RITS_API_KEY": "k"}))
+        self.assertEqual((azure.provider, azure.model_name, azure.api_key), ("azure", "gpt-4o", "t"))
+
+    def test_import_does_not_load_llm_clients(self):
+        code = "import sys, lumyn.llm_backends.init_backend; print('crewai' in sys.modules or 'litellm' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+        self.assertEqual(output.stdout.strip(), "False", output.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
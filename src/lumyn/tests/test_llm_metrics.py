@@ -0,0 +1,62 @@
+import datetime
+import json
+import unittest
+import urllib.request
+
+from lumyn.llm_backends.metrics import LLMMetrics, agent_metrics_callback, LLM_METRICS, start_metrics_server
+
+
+class TestLLMMetrics(unittest.TestCase):
+    def test_prometheus_exposition(self):
+        metrics = LLMMetrics()
+        metrics.observe("tools", "nl2kubectl.generate", "openai/gpt-4o", 0.4, ttft=0.1, usage={"prompt_tokens": 100, "completion_tokens": 20, "cached_tokens": 64})
+        metrics.observe("tools", "nl2kubectl.generate", "openai/gpt-4o", 3.0)
+        metrics.observe_error("tools", "nl2kubectl.generate", "openai/gpt-4o")
+        text = metrics.to_prometheus()
+
+        labels = 'source="tools",call_site="nl2kubectl.generate",model="openai/gpt-4o"'
+        self.assertIn(f"lumyn_llm_requests_total{{{labels}}} 2", text)
+        self.assertIn(f"lumyn_llm_errors_total{{{labels}}} 1", text)
+        self.assertIn(f'lumyn_llm_tokens_total{{{labels},type="cached_tokens"}} 64', text)
+        self.assertIn(f'lumyn_llm_request_duration_seconds_bucket{{{labels},le="0.5"}} 1', text)
+        self.assertIn(f'lumyn_llm_request_duration_seconds_bucket{{{labels},le="5.0"}} 2', text)
+        self.assertIn(f'lumyn_llm_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f"lumyn_llm_time_to_first_token_seconds_count{{{labels}}} 1", text)
+        self.assertIn("# TYPE lumyn_llm_request_duration_seconds histogram", text)
+
+    def test_snapshot(self):
+        metrics = LLMMetrics()
+        metrics.observe("tools", "report.code", "m", 1.0, usage={"prompt_tokens": 10})
+        metrics.observe("tools", "report.code", "m", 3.0)
+        series = metrics.snapshot()["series"][0]
+        self.assertEqual(series["calls"], 2)
+        self.assertEqual(series["latency_seconds_mean"], 2.0)
+        self.assertEqual(series["tokens"], {"prompt_tokens": 10})
+        json.dumps(metrics.snapshot())
+
+    def test_agent_callback_skips_tool_calls(self):
+        LLM_METRICS.clear()
+        start = datetime.datetime(2025, 1, 1)
+        end = start + datetime.timedelta(seconds=2)
+        agent_metrics_callback({"model": "m", "stream": True, "completion_start_time": start + datetime.timedelta(seconds=0.5)}, None, start, end)
+        agent_metrics_callback({"model": "m", "litellm_params": {"metadata": {"lumyn_source": "tools"}}}, None, start, end)
+        series = LLM_METRICS.snapshot()["series"]
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]["source"], "agents")
+        self.assertEqual(series[0]["ttft_seconds_mean"], 0.5)
+        LLM_METRICS.clear()
+
+    def test_metrics_server(self):
+        metrics = LLMMetrics()
+        metrics.observe("agents", "agent", "m", 1.0)
+        server = start_metrics_server(0, metrics, host="127.0.0.1")
+        try:
+            port = server.server_address[1]
+            body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+            self.assertIn('lumyn_llm_requests_total{source="agents",call_site="agent",model="m"} 1', body)
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+from lumyn.tools.observability_stack.metrics_stats import _to_matrix, choose_step, format_shaped_result, iter_series, lttb, series_stats, shape_range_result
+
+
+def matrix(*series):
+    return {"status": "success", "data": {"resultType": "matrix", "result": [
+        {"metric": metric, "values": [[1700000000 + 60 * i, str(value)] for i, value in enumerate(values) if value is not None]}
+        for metric, values in series]}}
+
+
+def parse_matrix(response):
+    return _to_matrix(list(iter_series(response)))
+
+
+class TestMetricsStats(unittest.TestCase):
+    def test_choose_step(self):
+        self.assertEqual(choose_step(0, 3600, 240), 15)
+        self.assertEqual(choose_step(0, 6 * 3600, 240), 120)
+        self.assertEqual(choose_step(0, 3600, 1000), 15)
+
+    def test_parse_matrix_aligns_gaps(self):
+        labels, timestamps, values = parse_matrix(matrix(({"pod": "a"}, [1, 2, 3]), ({"pod": "b"}, [None, 5, 6])))
+        self.assertEqual(labels, [{"pod": "a"}, {"pod": "b"}])
+        self.assertEqual(len(timestamps), 3)
+        self.assertTrue(np.isnan(values[1, 0]))
+        self.assertEqual(values[1, 2], 6.0)
+
+    def test_series_stats(self):
+        _, timestamps, values = parse_matrix(matrix(({"pod": "flat"}, [1, 1, 1, 1]), ({"pod": "ramp"}, [0, 1, 2, 3]), ({"pod": "jump"}, [1, 2, 1, 9])))
+        stats = series_stats(timestamps, values)
+        self.assertEqual(stats["min"].tolist(), [1.0, 0.0, 1.0])
+        self.assertEqual(stats["max"].tolist(), [1.0, 3.0, 9.0])
+        self.assertAlmostEqual(stats["slope_per_min"][1], 1.0)
+        self.assertEqual(stats["zscore"][0], 0.0)
+        self.assertTrue(np.isfinite(stats["zscore"][2]))
+        self.assertGreater(stats["zscore"][2], 0)
+
+    def test_larger_jump_off_flat_baseline_ranks_higher(self):
+        _, timestamps, values = parse_matrix(matrix(({"pod": "small"}, [5, 5, 5, 6]), ({"pod": "large"}, [5, 5, 5, 50]), ({"pod": "drop"}, [5, 5, 5, 0])))
+        zscore = series_stats(timestamps, values)["zscore"]
+        self.assertTrue(np.all(np.isfinite(zscore)))
+        self.assertGreater(zscore[1], zscore[0])
+        self.assertGreater(abs(zscore[2]), zscore[0])
+
+    def test_format_shaped_result(self):
+        shaped = shape_range_result(iter_series(matrix(({"__name__": "up", "pod": "a"}, [1, 1, 1, 1]), ({"__name__": "up", "pod": "b"}, [1, 1, 1, 0]))), top_k=1)
+        lines = format_shaped_result(shaped).splitlines()
+        self.assertTrue(lines[2].startswith('up{pod="b"} |'))
+        self.assertEqual(lines[-1], "... 1 more series")
+        self.assertEqual(format_shaped_result(shape_range_result(iter_series(matrix()))), "No series returned.")
+
+    def test_lttb(self):
+        x = np.arange(100, dtype=float)
+        y = np.zeros(100)
+        y[37] = 10.0
+        sampled_x, sampled_y = lttb(x, y, 10)
+        self.assertEqual(len(sampled_x), 10)
+        self.assertEqual((sampled_x[0], sampled_x[-1]), (0.0, 99.0))
+        self.assertIn(37.0, sampled_x.tolist())
+        self.assertEqual(len(lttb(x, y, 200)[0]), 100)
+
+    def test_shape_range_result_keeps_top_k(self):
+        series = [({"pod": f"p{i}"}, [[1700000000 + 60 * t, str(i if t == 3 else 0)] for t in range(4)]) for i in range(10)]
+        shaped = shape_range_result(iter(series), top_k=3, points=3, batch_size=4)
+        self.assertEqual(shaped["series_total"], 10)
+        self.assertEqual([entry["metric"]["pod"] for entry in shaped["series"]], ["p9", "p8", "p7"])
+        self.assertEqual(len(shaped["series"][0]["shape"]), 3)
+        self.assertEqual(shaped["step"], 60.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
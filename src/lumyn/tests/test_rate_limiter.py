@@ -0,0 +1,71 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from lumyn.llm_backends.rate_limiter import RateLimiter, retry_after_seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_disabled_limiter_never_waits(self):
+        limiter = RateLimiter()
+        for _ in range(100):
+            self.assertEqual(limiter.acquire(10_000), 0.0)
+
+    def test_request_bucket_refills_over_time(self):
+        now = [0.0]
+        limiter = RateLimiter(requests_per_minute=60, clock=lambda: now[0])
+        limiter._request_budget = 0
+        waited = []
+        thread = threading.Thread(target=lambda: waited.append(limiter.acquire()))
+        thread.start()
+        time.sleep(0.05)
+        self.assertTrue(thread.is_alive())
+        now[0] = 1.0
+        with limiter._cond:
+            limiter._cond.notify_all()
+        thread.join(timeout=2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(waited, [1.0])
+        self.assertEqual(limiter.stats()["admitted"], 1)
+
+    def test_admission_is_fifo(self):
+        limiter = RateLimiter(tokens_per_minute=60_000)
+        limiter._token_budget = 0
+        order = []
+
+        def worker(name, tokens):
+            limiter.acquire(tokens)
+            order.append(name)
+
+        big = threading.Thread(target=worker, args=("big", 500))
+        big.start()
+        time.sleep(0.05)
+        small = threading.Thread(target=worker, args=("small", 1))
+        small.start()
+        big.join(timeout=5)
+        small.join(timeout=5)
+        self.assertEqual(order, ["big", "small"])
+
+    def test_settle_corrects_token_estimate(self):
+        limiter = RateLimiter(tokens_per_minute=1000)
+        limiter.acquire(100)
+        limiter.settle(100, 400)
+        self.assertAlmostEqual(limiter._token_budget, 600, delta=1)
+
+    def test_pause_blocks_admission(self):
+        limiter = RateLimiter(requests_per_minute=6000)
+        limiter.pause(0.1)
+        self.assertGreaterEqual(limiter.acquire(), 0.09)
+        self.assertEqual(limiter.stats()["throttled"], 1)
+
+    def test_retry_after_header(self):
+        error = SimpleNamespace(response=SimpleNamespace(headers={"retry-after": "7"}))
+        self.assertEqual(retry_after_seconds(error), 7.0)
+        error = SimpleNamespace(response=SimpleNamespace(headers={"retry-after-ms": "1500"}))
+        self.assertEqual(retry_after_seconds(error), 1.5)
+        self.assertEqual(retry_after_seconds(Exception(), default=2), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
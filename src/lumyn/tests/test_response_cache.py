@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+import unittest
+
+from lumyn.llm_backends.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_key_is_order_independent(self):
+        a = ResponseCache.make_key({"model": "m", "messages": [{"role": "user", "content": "hi"}]})
+        b = ResponseCache.make_key({"messages": [{"role": "user", "content": "hi"}], "model": "m"})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, ResponseCache.make_key({"model": "m2", "messages": [{"role": "user", "content": "hi"}]}))
+
+    def test_hit_and_miss_counters(self):
+        cache = ResponseCache(path=self.path)
+        self.assertEqual(cache.get("k"), (False, None))
+        cache.put("k", {"content": "kubectl get pods -n otel-demo"})
+        self.assertEqual(cache.get("k"), (True, {"content": "kubectl get pods -n otel-demo"}))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+    def test_persists_across_instances(self):
+        ResponseCache(path=self.path).put("k", {"function_name": "f", "arguments": {"a": 1}})
+        self.assertEqual(ResponseCache(path=self.path).get("k"), (True, {"function_name": "f", "arguments": {"a": 1}}))
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(path=self.path, ttl_seconds=0.01)
+        cache.put("k", {"content": "x"})
+        time.sleep(0.05)
+        self.assertEqual(cache.get("k"), (False, None))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(path=self.path, max_bytes=100)
+        cache.put("a", {"content": "a" * 30})
+        time.sleep(0.01)
+        cache.put("b", {"content": "b" * 30})
+        time.sleep(0.01)
+        cache.get("a")
+        cache.put("c", {"content": "c" * 30})
+        self.assertTrue(cache.get("a")[0])
+        self.assertFalse(cache.get("b")[0])
+        self.assertTrue(cache.get("c")[0])
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from lumyn.llm_backends.router_backend import EndpointStats, RouterLLMBackend
+
+
+class FakeBackend():
+    def __init__(self, name, delay=0.0, fail=False):
+        self.provider, self.model_name, self.url = "openai", name, ""
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def inference(self, system_prompt, input, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.model_name} down")
+        return f"{self.model_name}:{input}"
+
+
+class TestEndpointStats(unittest.TestCase):
+    def test_errors_raise_the_score(self):
+        stats = EndpointStats(alpha=0.5)
+        stats.record_success(1.0)
+        self.assertEqual(stats.score(10.0), 1.0)
+        stats.record_error()
+        self.assertEqual(stats.score(10.0), 1.0 * (1 + 4 * 0.5))
+
+    def test_failing_endpoint_without_latency_is_penalised(self):
+        stats = EndpointStats(alpha=0.5)
+        self.assertEqual(stats.score(10.0), 0.0)
+        stats.record_error()
+        self.assertEqual(stats.score(10.0), 10.0 * (1 + 4 * 0.5))
+
+    def test_p95_needs_enough_samples(self):
+        stats = EndpointStats(min_samples=3)
+        stats.record_success(0.1)
+        self.assertIsNone(stats.p95())
+        for seconds in (0.2, 0.3, 5.0):
+            stats.record_success(seconds)
+        self.assertEqual(stats.p95(), 0.3)
+
+
+class TestRouterLLMBackend(unittest.TestCase):
+    def test_prefers_faster_endpoint(self):
+        slow, fast = FakeBackend("slow", delay=0.03), FakeBackend("fast")
+        router = RouterLLMBackend([slow, fast])
+        for _ in range(5):
+            router.inference("s", "x")
+        self.assertEqual(slow.calls, 1)
+        self.assertEqual(fast.calls, 4)
+
+    def test_fails_over_to_next_endpoint(self):
+        down, up = FakeBackend("down", fail=True), FakeBackend("up")
+        router = RouterLLMBackend([down, up])
+        self.assertEqual(router.inference("s", "x"), "up:x")
+        self.assertEqual(router.endpoint_stats()["endpoints"]["openai/down@"]["errors"], 1)
+
+    def test_always_failing_endpoint_is_not_ranked_first(self):
+        down, up = FakeBackend("down", fail=True), FakeBackend("up")
+        router = RouterLLMBackend([down, up])
+        for _ in range(5):
+            self.assertEqual(router.inference("s", "x"), "up:x")
+        self.assertEqual(down.calls, 1)
+        self.assertEqual(up.calls, 5)
+
+    def test_all_endpoints_down_raises(self):
+        router = RouterLLMBackend([FakeBackend("a", fail=True), FakeBackend("b", fail=True)])
+        with self.assertRaises(RuntimeError):
+            router.inference("s", "x")
+
+    def test_hedges_after_p95(self):
+        primary, secondary = FakeBackend("primary"), FakeBackend("secondary", delay=0.05)
+        router = RouterLLMBackend([primary, secondary], hedge=True, hedge_min_samples=3)
+        for seconds in (0.01, 0.01, 0.01):
+            router.stats[0].record_success(seconds)
+        router.stats[1].record_success(0.05)
+        primary.delay = 1.0
+        start = time.monotonic()
+        self.assertEqual(router.inference("s", "x"), "secondary:x")
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(router.hedges, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lumyn.llm_backends.routing import endpoint_kwargs, load_routes, resolve_route
+
+
+class TestRouting(unittest.TestCase):
+    def test_most_specific_route_wins(self):
+        routes = {"default": {"max_tokens": 1}, "report": {"max_tokens": 2}, "report.diagnosis": {"max_tokens": 3}}
+        self.assertEqual(resolve_route(routes, "report.diagnosis"), {"max_tokens": 3})
+        self.assertEqual(resolve_route(routes, "report.code"), {"max_tokens": 2})
+        self.assertEqual(resolve_route(routes, "nl2kubectl.generate"), {"max_tokens": 1})
+        self.assertEqual(resolve_route(routes, None), {"max_tokens": 1})
+        self.assertEqual(resolve_route({}, "report.code"), {})
+
+    def test_env_overrides_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as f:
+            f.write("report:\n  model: small\nnl2traces.summarize:\n  max_tokens: 500\n")
+        try:
+            env = {"LLM_ROUTES_FILE": f.name, "LLM_ROUTES": json.dumps({"report": {"model": "tiny"}})}
+            with mock.patch.dict(os.environ, env):
+                routes = load_routes()
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(routes["report"], {"model": "tiny"})
+        self.assertEqual(routes["nl2traces.summarize"], {"max_tokens": 500})
+
+    def test_unknown_setting_is_rejected(self):
+        with mock.patch.dict(os.environ, {"LLM_ROUTES": json.dumps({"report": {"modle": "x"}})}):
+            with self.assertRaises(ValueError):
+                load_routes()
+
+    def test_endpoint_kwargs_translates_rits(self):
+        self.assertEqual(endpoint_kwargs("rits", "llama", "http://rits/", "k"),
+                         {"provider": "openai", "model_name": "llama", "url": "http://rits", "api_key": "API_KEY", "api_version": "", "extra_headers": {"RITS_API_KEY": "k"}})
+
+    def test_routed_kwargs(self):
+        from lumyn.llm_backends.litellm_backend import LiteLLMBackend
+
+        routes = {"nl2traces.summarize": {"provider": "openai", "model": "gpt-4o-mini", "url": "https://api.openai.com/v1", "api_key": "o"},
+                  "nl2kubectl.generate": {"max_tokens": 1000},
+                  "nl2metrics.generate": {"max_tokens": 8000},
+                  "report": {"provider": "rits", "model": "llama", "url": "http://rits", "api_key": "r"}}
+        backend = LiteLLMBackend(provider="anthropic", model_name="claude-sonnet", url="https://api.anthropic.com", api_key="a", api_version="",
+                                 seed=10, top_p=0.95, temperature=0.0, reasoning_effort="", thinking_tools="anthropic",
+                                 thinking_budget_tools=16000, max_tokens=24000, extra_headers={"x": "y"}, routes=routes)
+
+        default = backend._build_kwargs("s", "i")
+        self.assertEqual((default["model"], default["api_key"], default["max_tokens"]), ("anthropic/claude-sonnet", "a", 24000))
+        self.assertEqual(default["thinking"], {"type": "enabled", "budget_tokens": 16000})
+        self.assertNotIn("top_p", default)
+
+        capped = backend._build_kwargs("s", "i", call_site="nl2metrics.generate")
+        self.assertEqual((capped["max_tokens"], capped["thinking"]["budget_tokens"]), (8000, 7999))
+
+        # No room for the minimum thinking budget below max_tokens: thinking is dropped.
+        generate = backend._build_kwargs("s", "i", call_site="nl2kubectl.generate")
+        self.assertEqual(generate["max_tokens"], 1000)
+        self.assertNotIn("thinking", generate)
+        self.assertEqual(generate["top_p"], 0.95)
+
+        summarize = backend._build_kwargs("s", "i", call_site="nl2traces.summarize")
+        self.assertEqual((summarize["model"], summarize["api_key"], summarize["extra_headers"]), ("openai/gpt-4o-mini", "o", None))
+        self.assertNotIn("thinking", summarize)
+        self.assertEqual(summarize["top_p"], 0.95)
+
+        report = backend._build_kwargs("s", "i", call_site="report.diagnosis")
+        self.assertEqual((report["model"], report["api_key"], report["extra_headers"]), ("openai/llama", "API_KEY", {"RITS_API_KEY": "r"}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from lumyn.tools.report_generation.structured_output import load_schema, parse_report, repair_json, validate
+
+
+class TestRepairJSON(unittest.TestCase):
+    def test_fenced_output_with_prose(self):
+        self.assertEqual(repair_json('Here is the report:\n```json\n{"a": 1}\n```\nDone.'), {"a": 1})
+
+    def test_comments_trailing_commas_and_python_literals(self):
+        text = '{"remediation": [ # plan 1\n [{"action": "restart pod",},],], "ok": True, "x": None}'
+        self.assertEqual(repair_json(text), {"remediation": [[{"action": "restart pod"}]], "ok": True, "x": None})
+
+    def test_truncated_output_is_closed(self):
+        self.assertEqual(repair_json('{"commands": [{"command": "kubectl get po'), {"commands": [{"command": "kubectl get po"}]})
+
+    def test_text_after_the_object_is_ignored(self):
+        self.assertEqual(repair_json('{"a": "b # not a comment"} and {"c": 1}'), {"a": "b # not a comment"})
+
+    def test_no_json_raises(self):
+        with self.assertRaises(ValueError):
+            repair_json("no report today")
+
+
+class TestValidate(unittest.TestCase):
+    def test_diagnosis_schema(self):
+        schema = load_schema("diagnosis_schema_updated.json")
+        report = {"entities": [{"id": "svc-1", "root_cause": True}],
+                  "propagations": [{"source": "svc-1", "target": "svc-2", "condition": "oom", "effect": "5xx"}]}
+        self.assertEqual(validate(report, schema), [])
+
+        report["entities"][0]["root_cause"] = "yes"
+        report["extra"] = 1
+        del report["propagations"][0]["effect"]
+        errors = validate(report, schema)
+        self.assertIn("$: unexpected key 'extra'", errors)
+        self.assertIn("$.entities[0].root_cause: expected boolean, got str", errors)
+        self.assertIn("$.propagations[0]: missing required key 'effect'", errors)
+
+    def test_parse_report_allows_null_lists(self):
+        report, errors = parse_report('{"commands": null}', load_schema("code_schema.json"))
+        self.assertEqual((report, errors), ({"commands": None}, []))
+        report, errors = parse_report("nothing", load_schema("remediation_schema.json"))
+        self.assertIsNone(report)
+        self.assertEqual(len(errors), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,18 @@
+import unittest
+
+from lumyn.tools.time_phrases import normalize_time_phrases, time_window_seconds
+
+
+class TestTimePhrases(unittest.TestCase):
+    def test_time_window(self):
+        self.assertEqual(time_window_seconds("CPU of the frontend over the last 30 minutes"), 1800)
+        self.assertEqual(time_window_seconds("errors in the past hour"), 3600)
+        self.assertIsNone(time_window_seconds("current CPU of the frontend"))
+
+    def test_normalize_time_phrases(self):
+        self.assertEqual(normalize_time_phrases("errors in the past hour"), "errors last 3600s")
+        self.assertEqual(normalize_time_phrases("restarts 2 days ago"), "restarts 172800s ago")
+
+
+if __name__ == "__main__":
+    unittest.main()
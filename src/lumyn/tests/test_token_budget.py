@@ -0,0 +1,57 @@
+import json
+import unittest
+
+from lumyn.llm_backends.token_budget import trim_payload
+
+
+def char_counter(text):
+    return len(text)
+
+
+def jaeger_payload(n_traces=3, n_spans=20):
+    return {"data": [{
+        "traceID": f"t{t}",
+        "spans": [{"spanID": f"s{s}", "operationName": "GET", "processID": "p1",
+                   "references": [{"refType": "CHILD_OF", "spanID": "s0"}],
+                   "tags": [{"key": "error", "value": True}, {"key": "net.peer.ip", "value": "10.0.0.1"}],
+                   "logs": [{"timestamp": 1, "fields": [{"key": "event", "value": "x" * 50}]}]}
+                  for s in range(n_spans)],
+        "processes": {"p1": {"serviceName": "frontend", "tags": [{"key": "hostname", "value": "h" * 40}]}},
+        "warnings": None,
+    } for t in range(n_traces)]}
+
+
+class TestTokenBudget(unittest.TestCase):
+    def test_small_payload_is_unchanged(self):
+        payload = {"status": "success", "data": {"result": []}}
+        text, original, final = trim_payload(payload, 1000, char_counter)
+        self.assertEqual(json.loads(text), payload)
+        self.assertEqual(original, final)
+
+    def test_low_value_fields_go_first(self):
+        payload = jaeger_payload()
+        full = len(json.dumps(payload))
+        text, original, final = trim_payload(payload, full - 500, char_counter)
+        trimmed = json.loads(text)
+        self.assertLessEqual(final, full - 500)
+        self.assertEqual(len(trimmed["data"]), 3)
+        self.assertEqual(trimmed["data"][0]["processes"]["p1"], {"serviceName": "frontend"})
+        self.assertEqual(trimmed["data"][0]["spans"][0]["tags"][0]["key"], "error")
+        self.assertIn("tags", payload["data"][0]["processes"]["p1"])
+
+    def test_lists_are_truncated_to_fit(self):
+        payload = {"data": {"result": [{"metric": {"pod": f"pod-{i}"}, "value": [1, str(i)]} for i in range(500)]}}
+        text, original, final = trim_payload(payload, 2000, char_counter)
+        trimmed = json.loads(text)
+        self.assertLessEqual(final, 2000)
+        self.assertGreater(original, final)
+        result = trimmed["data"]["result"]
+        self.assertEqual(result[-1]["truncated_items"] + len(result) - 1, 500)
+
+    def test_tiny_budget_terminates(self):
+        text, original, final = trim_payload(jaeger_payload(), 10, char_counter)
+        self.assertLessEqual(final, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
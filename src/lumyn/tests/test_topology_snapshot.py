@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+
+from lumyn.tools.observability_stack.topology_snapshot import IM_USED, NOT_MODIFIED, SnapshotOutOfSync, TopologySnapshot, apply_json_patch
+
+
+class TestTopologySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "topology_nodes.json")
+        self.nodes = {"nodes": [{"id": "cart", "kind": "Deployment"}, {"id": "redis", "kind": "StatefulSet"}]}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_apply_json_patch(self):
+        document = {"a": [1, 2], "b": {"c": "x"}}
+        patched = apply_json_patch(document, [
+            {"op": "add", "path": "/a/-", "value": 3},
+            {"op": "remove", "path": "/a/0"},
+            {"op": "replace", "path": "/b/c", "value": "y"},
+            {"op": "copy", "from": "/b", "path": "/d"},
+            {"op": "move", "from": "/d/c", "path": "/e~1f"},
+            {"op": "test", "path": "/a", "value": [2, 3]},
+        ])
+        self.assertEqual(patched, {"a": [2, 3], "b": {"c": "y"}, "d": {}, "e/f": "y"})
+        with self.assertRaises(ValueError):
+            apply_json_patch(patched, [{"op": "test", "path": "/a", "value": []}])
+
+    def test_conditional_refresh(self):
+        snapshot = TopologySnapshot(self.path)
+        self.assertEqual(snapshot.request_headers(), {})
+        self.assertEqual(snapshot.update(200, {"ETag": '"v1"'}, self.nodes), self.nodes)
+        self.assertTrue(snapshot.changed)
+        self.assertTrue(snapshot.save())
+        self.assertFalse(snapshot.save())
+
+        reloaded = TopologySnapshot(self.path)
+        self.assertEqual(reloaded.request_headers(), {"A-IM": "json-patch", "If-None-Match": '"v1"'})
+        self.assertEqual(reloaded.update(NOT_MODIFIED, {}), self.nodes)
+        self.assertFalse(reloaded.changed)
+
+        patched = reloaded.update(IM_USED, {"ETag": '"v2"'}, [{"op": "replace", "path": "/nodes/1/kind", "value": "Deployment"}])
+        self.assertEqual(patched["nodes"][1]["kind"], "Deployment")
+        self.assertTrue(reloaded.changed)
+        self.assertTrue(reloaded.save())
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), patched)
+
+    def test_unresolvable_responses_are_out_of_sync(self):
+        snapshot = TopologySnapshot(self.path)
+        snapshot.update(200, {"ETag": '"v1"'}, self.nodes)
+        with self.assertRaises(SnapshotOutOfSync):
+            snapshot.update(IM_USED, {"ETag": '"v2"'}, [{"op": "remove", "path": "/nodes/5"}])
+        snapshot.save()
+        # A truncated local copy cannot answer a 304.
+        open(self.path, "w").close()
+        with self.assertRaises(SnapshotOutOfSync):
+            TopologySnapshot(self.path).update(NOT_MODIFIED, {})
+
+    def test_empty_snapshot_is_not_saved(self):
+        self.assertFalse(TopologySnapshot(self.path).save())
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_unchanged_full_response_is_not_rewritten(self):
+        snapshot = TopologySnapshot(self.path)
+        snapshot.update(200, {}, self.nodes)
+        snapshot.save()
+        mtime = os.stat(self.path).st_mtime_ns
+        snapshot.update(200, {}, json.loads(json.dumps(self.nodes)))
+        self.assertFalse(snapshot.changed)
+        self.assertFalse(snapshot.save())
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime)
+
+
+if __name__ == "__main__":
+    unittest.main()
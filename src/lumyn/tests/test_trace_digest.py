@@ -0,0 +1,86 @@
+import json
+import unittest
+
+from lumyn.tools.observability_stack.trace_digest import critical_path, build_tree, digest_traces, format_digest, percentile
+
+
+def span(span_id, operation, process, start, duration, parent=None, tags=None, logs=None):
+    return {
+        "traceID": "t1",
+        "spanID": span_id,
+        "operationName": operation,
+        "references": [{"refType": "CHILD_OF", "traceID": "t1", "spanID": parent}] if parent else [],
+        "startTime": start,
+        "duration": duration,
+        "tags": [{"key": key, "type": "string", "value": value} for key, value in (tags or {}).items()],
+        "logs": logs or [],
+        "processID": process,
+    }
+
+
+TRACES = {"data": [{
+    "traceID": "t1",
+    "processes": {"p1": {"serviceName": "frontend"}, "p2": {"serviceName": "checkout"}, "p3": {"serviceName": "payment"}},
+    "spans": [
+        span("a", "GET /checkout", "p1", 1000, 100000),
+        span("b", "PlaceOrder", "p2", 2000, 30000, parent="a"),
+        span("c", "Charge", "p3", 40000, 50000, parent="a", tags={"error": True, "otel.status_description": "card declined"}),
+        span("d", "Charge.retry", "p3", 95000, 3000, parent="c", tags={"http.status_code": 503}),
+    ],
+}]}
+
+
+class TestTraceDigest(unittest.TestCase):
+    def test_percentile(self):
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+        self.assertIsNone(percentile([], 50))
+
+    def test_tree_and_critical_path(self):
+        root, = build_tree(TRACES["data"][0])
+        self.assertEqual([child.span_id for child in root.children], ["b", "c"])
+        # "d" starts after its parent "c" ends, so only "c" is on the path below the root.
+        self.assertEqual([s.span_id for s in critical_path(root)], ["a", "c", "b"])
+
+    def test_digest(self):
+        digest = digest_traces(TRACES)
+        trace, = digest["traces"]
+        self.assertEqual(trace["root"], "frontend:GET /checkout")
+        self.assertEqual(trace["spans"], 4)
+        self.assertEqual(trace["error_spans"], 2)
+        self.assertEqual(trace["first_error"], {"span": "payment:Charge", "offset_ms": 39.0, "message": "card declined"})
+        self.assertEqual(digest["services"]["payment"]["errors"], 2)
+        self.assertEqual(digest["operations"][0]["errors"], 1)
+        self.assertEqual(digest["services"]["frontend"]["p50_ms"], 100.0)
+
+        text = format_digest(digest)
+        self.assertIn("First error: payment:Charge at +39.0ms: card declined", text)
+        self.assertLess(len(text), len(json.dumps(TRACES)) * 2)
+
+    def test_self_parent_and_cycles(self):
+        raw = {"traceID": "t2", "processes": {"p1": {"serviceName": "frontend"}}, "spans": [
+            span("a", "self", "p1", 1000, 5000, parent="a"),
+            span("b", "loop-b", "p1", 2000, 4000, parent="c"),
+            span("c", "loop-c", "p1", 3000, 2000, parent="b"),
+        ]}
+        roots = build_tree(raw)
+        self.assertEqual([root.span_id for root in roots], ["a", "b"])
+        self.assertEqual([s.span_id for s in critical_path(roots[1])], ["b", "c"])
+        trace, = digest_traces({"data": [raw]})["traces"]
+        self.assertEqual(trace["spans"], 3)
+
+        # Links that loop after the tree is built are still walked once.
+        roots[1].children[0].children.append(roots[1])
+        self.assertEqual([s.span_id for s in critical_path(roots[1])], ["b", "c"])
+
+    def test_truncated_note_is_kept(self):
+        digest = digest_traces({**TRACES, "truncated": "Response exceeded 100 bytes; only the first 1 items are included."})
+        self.assertEqual(format_digest(digest).splitlines()[-1], "Response exceeded 100 bytes; only the first 1 items are included.")
+
+    def test_empty_and_error_payloads(self):
+        self.assertEqual(format_digest(digest_traces({"data": []})), "No traces found.")
+        self.assertEqual(digest_traces("Error querying Jaeger traces")["traces"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import time
+import unittest
+
+from lumyn.tools.translation_cache import TranslationCache, normalize_query, reanchor
+
+
+class TestTranslationCache(unittest.TestCase):
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query('Get all pods in the "otel-demo"   namespace.'),
+                         normalize_query("get all pods in the otel-demo namespace"))
+        self.assertEqual(normalize_query("Error traces for 'frontend' in the past hour"),
+                         "error traces for frontend last 3600s")
+        self.assertEqual(normalize_query("latency over the last 60 minutes"), normalize_query("latency in the last hour"))
+        self.assertNotEqual(normalize_query("latency in the last 5m"), normalize_query("latency in the last 15m"))
+
+    def test_reanchor(self):
+        self.assertEqual(reanchor("rate(x[5m] @ 1700000000)", 1700000000, 1700000100), "rate(x[5m] @ 1700000100)")
+        arguments = {"service": "frontend", "start_time": 1699996400000000, "end_time": 1700000000000000, "limit": 5}
+        shifted = reanchor(arguments, 1700000000, 1700000100)
+        self.assertEqual(shifted["end_time"] - arguments["end_time"], 100 * 10 ** 6)
+        self.assertEqual(shifted["end_time"] - shifted["start_time"], 3600 * 10 ** 6)
+        self.assertEqual(shifted["limit"], 5)
+
+    def test_exact_reuse_and_invalidation(self):
+        cache = TranslationCache(path=":memory:")
+        cache.store("kubectl", "Get all pods in the 'otel-demo' namespace", "kubectl get pods -n otel-demo")
+        hit = cache.reuse("kubectl", "get all pods in the otel-demo namespace", lambda command: True)
+        self.assertEqual(hit.value, "kubectl get pods -n otel-demo")
+        self.assertIsNone(cache.reuse("kubectl", "get all pods in the otel-demo namespace", lambda command: False))
+        self.assertIsNone(cache.lookup("kubectl", "get all pods in the otel-demo namespace"))
+        self.assertIsNone(cache.lookup("metrics", "get all pods in the otel-demo namespace"))
+
+    def test_similarity_fallback(self):
+        cache = TranslationCache(path=":memory:", similarity_threshold=0.6)
+        cache.store("kubectl", "get all pods in the otel-demo namespace", "kubectl get pods -n otel-demo")
+        self.assertIsNotNone(cache.lookup("kubectl", "list all pods in the otel-demo namespace"))
+        # Entity names and windows must match exactly, however similar the wording.
+        self.assertIsNone(cache.lookup("kubectl", "get all pods in the otel-demo-2 namespace"))
+        self.assertIsNone(TranslationCache(path=":memory:").lookup("kubectl", "list all pods in the otel-demo namespace"))
+
+    def test_ttl(self):
+        cache = TranslationCache(path=":memory:", ttl_seconds=1)
+        cache.store("kubectl", "get pods", "kubectl get pods")
+        cache._conn.execute("UPDATE translations SET created = ?", (time.time() - 10,))
+        self.assertIsNone(cache.lookup("kubectl", "get pods"))
+
+
+if __name__ == "__main__":
+    unittest.main()
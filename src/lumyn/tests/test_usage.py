@@ -0,0 +1,40 @@
+import unittest
+
+from lumyn.llm_backends.usage import UsageTotals, extract_usage, is_tool_call
+
+
+class TestUsage(unittest.TestCase):
+    def test_openai_style_cached_tokens(self):
+        usage = {"prompt_tokens": 2000, "completion_tokens": 50,
+                 "prompt_tokens_details": {"cached_tokens": 1536},
+                 "completion_tokens_details": {"reasoning_tokens": 20}}
+        counts = extract_usage(usage)
+        self.assertEqual(counts["cached_tokens"], 1536)
+        self.assertEqual(counts["reasoning_tokens"], 20)
+
+    def test_anthropic_style_cached_tokens(self):
+        usage = {"prompt_tokens": 3000, "completion_tokens": 10,
+                 "cache_read_input_tokens": 2500, "cache_creation_input_tokens": 0}
+        self.assertEqual(extract_usage(usage)["cached_tokens"], 2500)
+
+    def test_missing_usage(self):
+        self.assertEqual(extract_usage(None)["prompt_tokens"], 0)
+
+    def test_is_tool_call(self):
+        self.assertTrue(is_tool_call({"litellm_params": {"metadata": {"lumyn_source": "tools"}}}))
+        # Before the call litellm only has the request kwargs, with the metadata at the top level.
+        self.assertTrue(is_tool_call({"metadata": {"lumyn_source": "tools"}}))
+        self.assertFalse(is_tool_call({"litellm_params": {"metadata": None}}))
+        self.assertFalse(is_tool_call({}))
+
+    def test_totals_hit_rate(self):
+        totals = UsageTotals()
+        totals.add({"prompt_tokens": 1000, "cached_tokens": 0})
+        totals.add({"prompt_tokens": 1000, "cached_tokens": 1000})
+        snapshot = totals.snapshot()
+        self.assertEqual(snapshot["calls"], 2)
+        self.assertEqual(snapshot["cache_hit_rate"], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
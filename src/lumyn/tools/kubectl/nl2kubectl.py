@@ -17,11 +17,12 @@ import logging
 import os
 import re
 import subprocess
-from typing import Any, Dict, Optional, Type
+from typing import Any, Dict, List, Optional, Type
 
 from crewai.tools.base_tool import BaseTool
 from pydantic import BaseModel, Field
 from lumyn.tools.linting.kubectl_linter import KubectlLinter
+from lumyn.tools.translation_cache import get_translation_cache
 from lumyn.config.tools import (
     NL2KubectlCustomToolInputPrompt,
     NL2KubectlCustomToolPrompt,
@@ -34,6 +35,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Only commands that read cluster state are reused from the translation cache.
+READ_ONLY_VERBS = {"get", "describe", "logs", "top", "events", "explain", "api-resources", "version", "cluster-info"}
+
+
+def _is_read_only(command: str) -> bool:
+    if re.search(r"[;&>`]|\$\(", command):
+        return False
+    for segment in command.split("|"):
+        parts = segment.split()
+        if "kubectl" not in parts:
+            continue
+        args = iter(parts[parts.index("kubectl") + 1:])
+        for arg in args:
+            if arg.startswith("-"):
+                if "=" not in arg:
+                    next(args, None)
+                continue
+            if arg not in READ_ONLY_VERBS:
+                return False
+            break
+    return "kubectl" in command
+
+
+def _is_cacheable(command: str, harmful_commands: List[str]) -> bool:
+    return _is_read_only(command) and not any(command.startswith(harmful_command) for harmful_command in harmful_commands)
+
 
 class NL2KubectlCustomToolInput(BaseModel):
     nl_query: str = Field(
@@ -91,18 +118,30 @@ class NL2KubectlCustomTool(BaseTool):
                     return f"NL2Kubectl Tool failed with: {exc}"
         else:
             try:
+                translation_cache = get_translation_cache()
+                cached = translation_cache.reuse(self.name, nl_query, lambda command: _is_cacheable(command, harmful_commands)) if translation_cache is not None else None
+                if cached is not None:
+                    output, returncode = self._execute_kubectl_command(cached.value)
+                    if returncode == 0:
+                        return output[0 : self.output_limit]
+                    translation_cache.invalidate(self.name, cached.key)
+
                 command = self._generate_kubectl_command(prompt=nl_query)
                 for harmful_command in harmful_commands:
                     if command.startswith(harmful_command):
                         return f"Potentially harmful command found. Execution is not allowed. The harmful command was: {command}"
-                return self._execute_kubectl_command(command)[0][0 : self.output_limit]
+                output, returncode = self._execute_kubectl_command(command)
+                if translation_cache is not None and returncode == 0 and _is_cacheable(command, harmful_commands):
+                    translation_cache.store(self.name, nl_query, command)
+                return output[0 : self.output_limit]
             except Exception as exc:
                 logger.error(f"NL2Kubectl Tool failed with: {exc}")
                 return f"NL2Kubectl Tool failed with: {exc}"
 
     def _generate_kubectl_command(self, prompt: str) -> str:
-        response = self.llm_backend.inference(
-            NL2KubectlSystemPrompt, NL2KubectlPrompt + prompt
+        response = self.llm_backend.inference_until_fence(
+            NL2KubectlSystemPrompt, prompt, "bash", prefix=NL2KubectlPrompt,
+            call_site="nl2kubectl.generate"
         )
         command_of_interest = (
             re.search(r"```bash\n(.*?)\n```", response, re.DOTALL).group(1).strip()
@@ -131,5 +170,5 @@ class NL2KubectlCustomTool(BaseTool):
 
     def _summarize_kubernetes(self, kubernetes):
         system_prompt = "You do kubectl output analysis and summarization. Look at the kubectl output given to you and provide a brief summary and analysis of them."
-        kubernetes_summary = self.llm_backend.inference(system_prompt, kubernetes)
+        kubernetes_summary = self.llm_backend.inference(system_prompt, kubernetes, call_site="nl2kubectl.summarize")
         return kubernetes_summary
@@ -15,7 +15,7 @@
 
 import json
 import time
-from typing import Dict, List, Optional
+from typing import Collection, Dict, List, Optional
 
 from pydantic import BaseModel, ValidationError
 
@@ -33,7 +33,12 @@ class JaegerLinter:
     def __init__(self):
         pass
 
-    def lint(self, arguments, services, operations, current_time: int):
+    def lint(self, arguments, services: Optional[Collection[str]], operations: Optional[Collection[str]], current_time: int):
+        """
+        `services` and `operations` are only used for membership checks and are
+        not copied; pass sets (as nl2traces does with its cached catalogs) for
+        O(1) lookups.
+        """
         max_time = 43200000000
         lower_limit = 1
         upper_limit = 5
@@ -41,6 +46,8 @@ class JaegerLinter:
         # threshold_for_golden_period: int = 1800000) -> str:
 
         try:
+            services = services or ()
+            operations = operations or ()
             args = ArgumentsModel.model_validate_json(json.dumps(arguments))
             lint_message = str()
 
@@ -51,9 +58,9 @@ class JaegerLinter:
             if not (lower_limit <= args.limit <= upper_limit):
                 lint_message += f"Invalid limit. Limit should be between {lower_limit} and {upper_limit}."
             if args.service not in services:
-                lint_message += f"{args.service} is an Invalid service name, Valid service names are {services}."
+                lint_message += f"{args.service} is an Invalid service name, Valid service names are {sorted(services)}."
             if args.operation not in operations and args.operation is not None:
-                lint_message += f"Invalid operation, Valid operations are {operations} or None to use all operations."
+                lint_message += f"Invalid operation, Valid operations are {sorted(operations)} or None to use all operations."
             # if not (alert_generation_time - threshold_for_golden_period <= args.end_time <= current_time):
             #   lint_message += f"Invalid end time. End time should be between {alert_generation_time - threshold_for_golden_period} and {current_time}."
 
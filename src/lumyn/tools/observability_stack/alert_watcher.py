@@ -0,0 +1,166 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+NEW, CHANGED, RESOLVED = "new", "changed", "resolved"
+# Annotations usually template {{ $value }}, so only the keys listed here count towards a change.
+COMPARED_ANNOTATIONS = tuple(key.strip() for key in os.getenv("ALERT_COMPARE_ANNOTATIONS", "").split(",") if key.strip())
+AlertEvent = namedtuple("AlertEvent", ["kind", "fingerprint", "alert"])
+
+
+def alert_fingerprint(alert: Dict[str, Any]) -> str:
+    """Identity of an alert: a hash of its label set, as Alertmanager does."""
+    labels = json.dumps(alert.get("labels") or {}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(labels.encode("utf-8")).hexdigest()[:16]
+
+
+def _signature(alert: Dict[str, Any]) -> str:
+    # The sample value (and annotations rendered from it) moves on every evaluation, so it does not count as a change.
+    annotations = alert.get("annotations") or {}
+    return json.dumps({"state": alert.get("state"), "activeAt": alert.get("activeAt"), "labels": alert.get("labels"),
+                       "annotations": {key: annotations.get(key) for key in COMPARED_ANNOTATIONS}}, sort_keys=True, default=str)
+
+
+def diff_alerts(previous: Dict[str, Dict[str, Any]], alerts: List[Dict[str, Any]]) -> tuple:
+    """Compare an alert list with a fingerprint->alert map; returns (current map, new/changed/resolved events)."""
+    current = {alert_fingerprint(alert): alert for alert in alerts}
+    events = []
+    for fingerprint, alert in current.items():
+        if fingerprint not in previous:
+            events.append(AlertEvent(NEW, fingerprint, alert))
+        elif _signature(previous[fingerprint]) != _signature(alert):
+            events.append(AlertEvent(CHANGED, fingerprint, alert))
+    events.extend(AlertEvent(RESOLVED, fingerprint, alert) for fingerprint, alert in previous.items() if fingerprint not in current)
+    return current, events
+
+
+def summarize_alert_events(events: List[AlertEvent], firing: int) -> Dict[str, Any]:
+    """Compact view of one diff: counts, full entries for new/changed alerts and only the labels of resolved ones."""
+    delta = {"summary": {"firing": firing, **{kind: sum(event.kind == kind for event in events) for kind in (NEW, CHANGED, RESOLVED)}}}
+    for kind in (NEW, CHANGED):
+        entries = [{"fingerprint": event.fingerprint, **event.alert} for event in events if event.kind == kind]
+        if entries:
+            delta[kind] = entries
+    resolved = [{"fingerprint": event.fingerprint, "labels": event.alert.get("labels")} for event in events if event.kind == RESOLVED]
+    if resolved:
+        delta[RESOLVED] = resolved
+    return delta
+
+
+def poll_with_backoff(fetch: Callable[[], Any], ready: Callable[[Any], bool], poll_interval: float = 5.0,
+                      max_interval: float = 60.0, backoff: float = 2.0, timeout: float = 0.0,
+                      what: str = "result", sleep: Callable[[float], None] = time.sleep,
+                      clock: Callable[[], float] = time.monotonic) -> Any:
+    """
+    Call `fetch` until `ready(result)`, sleeping `poll_interval` after the first
+    miss and multiplying the pause by `backoff` up to `max_interval`. Exceptions
+    from `fetch` count as misses. Raises TimeoutError after `timeout` seconds
+    (0 waits forever).
+    """
+    deadline = clock() + timeout if timeout > 0 else None
+    interval = poll_interval
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            result = fetch()
+            if ready(result):
+                return result
+        except Exception as e:
+            logger.warning(f"Polling for {what} failed: {e}")
+        if deadline is not None and clock() + interval > deadline:
+            raise TimeoutError(f"No {what} after {attempts} attempts in {timeout} seconds.")
+        logger.info(f"No {what} yet, polling again in {interval:.1f}s")
+        sleep(interval)
+        interval = min(max_interval, interval * backoff)
+
+
+class AlertWatcher():
+    """
+    Polls firing alerts with exponential backoff, deduplicates them by label
+    fingerprint and turns each poll into new/changed/resolved events.
+
+    `fetch` returns the list of firing alerts and raises on errors, so a failed
+    poll never reads as every alert having resolved.
+    """
+
+    def __init__(self, fetch: Callable[[], List[Dict[str, Any]]], poll_interval: float = 5.0, max_interval: float = 60.0,
+                 backoff: float = 2.0, timeout: float = 0.0, sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic):
+        self.fetch = fetch
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self.sleep = sleep
+        self.clock = clock
+        self.alerts: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_env(cls, fetch: Callable[[], List[Dict[str, Any]]]) -> "AlertWatcher":
+        return cls(fetch,
+                   poll_interval=float(os.getenv("ALERT_POLL_INTERVAL", 5)),
+                   max_interval=float(os.getenv("ALERT_POLL_MAX_INTERVAL", 60)),
+                   timeout=float(os.getenv("ALERT_WAIT_TIMEOUT", 0)))
+
+    def backoff_settings(self) -> Dict[str, Any]:
+        return dict(poll_interval=self.poll_interval, max_interval=self.max_interval, backoff=self.backoff,
+                    timeout=self.timeout, sleep=self.sleep, clock=self.clock)
+
+    def poll(self) -> List[AlertEvent]:
+        """One fetch; updates the known alerts and returns what changed since the previous poll."""
+        self.alerts, events = diff_alerts(self.alerts, self.fetch())
+        for event in events:
+            logger.info(f"Alert {event.kind}: {(event.alert.get('labels') or {}).get('alertname')} ({event.fingerprint})")
+        return events
+
+    def wait_for_alerts(self) -> List[Dict[str, Any]]:
+        """Block until at least one alert is firing and return the firing alerts."""
+        poll_with_backoff(self.poll, lambda events: bool(self.alerts), what="firing alerts", **self.backoff_settings())
+        return list(self.alerts.values())
+
+    def events(self) -> Iterator[AlertEvent]:
+        """
+        Yield alert events as they happen. The pause between polls resets to
+        `poll_interval` after a change and backs off while nothing changes.
+        Stops after `timeout` seconds without a change (0 watches forever).
+        """
+        interval = self.poll_interval
+        last_change = self.clock()
+        while True:
+            try:
+                events = self.poll()
+            except Exception as e:
+                logger.warning(f"Polling alerts failed: {e}")
+                events = []
+            if events:
+                yield from events
+                interval = self.poll_interval
+                last_change = self.clock()
+            elif self.timeout > 0 and self.clock() - last_change > self.timeout:
+                return
+            self.sleep(interval)
+            if not events:
+                interval = min(self.max_interval, interval * self.backoff)
@@ -0,0 +1,97 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class CatalogCache():
+    """
+    Process-wide TTL cache for slowly changing catalogs, such as the Jaeger
+    service and operation lists.
+
+    An entry older than `refresh_after` seconds is still served, but is
+    reloaded on a background thread. Only entries older than `ttl_seconds`
+    are reloaded inline. A loader returning None (a failed request) leaves the
+    cached value in place. `ttl_seconds=0` disables caching.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, refresh_after: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.refresh_after = ttl_seconds / 2 if refresh_after is None else refresh_after
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._entries: Dict[Hashable, tuple] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "CatalogCache":
+        return cls(ttl_seconds=float(os.getenv("JAEGER_CATALOG_TTL", 300)))
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        if self.ttl_seconds <= 0:
+            return loader()
+        with self._lock:
+            entry = self._entries.get(key)
+            age = self.clock() - entry[1] if entry is not None else None
+            if entry is not None and age < self.ttl_seconds:
+                self.hits += 1
+                if age >= self.refresh_after and key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(target=self._refresh, args=(key, loader), name="catalog-refresh", daemon=True).start()
+                return entry[0]
+            self.misses += 1
+        return self._load(key, loader)
+
+    def _load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        value = loader()
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (value, self.clock())
+        return value
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any]):
+        try:
+            self._load(key, loader)
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            logger.warning(f"CatalogCache: background refresh of {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "refreshes": self.refreshes, "entries": len(self._entries)}
+
+
+JAEGER_CATALOG = CatalogCache.from_env()
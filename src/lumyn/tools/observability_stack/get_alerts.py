@@ -15,10 +15,11 @@
 
 import json
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, ClassVar, Dict, List, Optional
 
 from crewai.tools.base_tool import BaseTool
 
+from .alert_watcher import diff_alerts, summarize_alert_events
 from .observability_stack_base_client import ObservabilityStackBaseClient
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
@@ -28,26 +29,46 @@ logger = logging.getLogger(__name__)
 class GetAlertsCustomTool(BaseTool, ObservabilityStackBaseClient):
     name: str = "GetAlerts Tool"
     description: str = "Retrieves real-time alerts on the IT environment via the Prometheus Alerts API."
+    DELTA_DESCRIPTION: ClassVar[str] = ("Reports how real-time alerts on the IT environment changed since the previous call: "
+                                        "counts of firing, new, changed and resolved alerts and only the alerts that changed.")
     cache_function: bool = False
+    # In delta mode each call reports only what changed since the previous call on this instance.
+    delta_mode: bool = False
+    previous_alerts: Optional[Dict[str, Dict[str, Any]]] = None
 
     def _run(self) -> str:
         ObservabilityStackBaseClient.model_post_init(self)
-        data = None
         try:
-            url = f"{self.observability_stack_url}/prometheus/api/v1/alerts"
-            response = self._make_request("GET", url)
-            logger.info(f"GetAlertsCustomTool: {response.status_code}")
-            logger.info(f"GetAlertsCustomTool: {response.content}")
-            print(f"GetAlertsCustomTool: {response.status_code}")
-            print(f"GetAlertsCustomTool: {response.content}")
-            data = response.json()
-            if response.status_code == 200:
-                if len(data["data"]["alerts"]) == 0:
-                    return None
-                alerts = list(filter(lambda i: i["state"] == "firing", data["data"]["alerts"]))
-                return alerts
-            return None
+            alerts = self.fetch_alerts()
+            if self.delta_mode:
+                return self._delta(alerts)
+            if len(alerts) == 0:
+                return None
+            return alerts
         except Exception as e:
             print(f"Error querying Prometheus Alerts API: {str(e)}")
             logger.error(f"Error querying Prometheus Alerts API: {str(e)}")
             return None
+
+    def _delta(self, alerts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        first_call = self.previous_alerts is None
+        self.previous_alerts, events = diff_alerts(self.previous_alerts or {}, alerts)
+        delta = summarize_alert_events(events, len(alerts))
+        if first_call:
+            delta["note"] = "First call: every firing alert is listed as new. Later calls list only changes."
+        elif not events:
+            delta["note"] = "No change since the previous call."
+        elif not alerts:
+            delta["note"] = "All alerts have resolved."
+        return delta
+
+    def fetch_alerts(self) -> List[Dict[str, Any]]:
+        """Firing alerts (an empty list when none are); raises when the Alerts API cannot be queried."""
+        if self.session is None:
+            ObservabilityStackBaseClient.model_post_init(self)
+        url = f"{self.observability_stack_url}/prometheus/api/v1/alerts"
+        response = self._make_request("GET", url)
+        data = response.json()
+        logger.info(f"GetAlertsCustomTool: {response.status_code}, {len(data['data']['alerts'])} alerts")
+        print(f"GetAlertsCustomTool: {response.status_code}")
+        return list(filter(lambda i: i["state"] == "firing", data["data"]["alerts"]))
@@ -15,17 +15,23 @@
 
 import json
 import logging
+import os
 from typing import Any, Dict, Optional
 
 from crewai.tools.base_tool import BaseTool
 
 from .observability_stack_base_client import ObservabilityStackBaseClient
+from .topology_snapshot import IM_USED, NOT_MODIFIED, SnapshotOutOfSync, TopologySnapshot
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# The report generation reads the topology from this file; the snapshot keeps it current across runs.
+TOPOLOGY_SNAPSHOT = TopologySnapshot(os.getenv("TOPOLOGY_SNAPSHOT_PATH", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "report_generation", "data", "topology_nodes.json")))
+
 
 class GetTopologyNodes(BaseTool, ObservabilityStackBaseClient):
     name: str = "GetTopology Tool"
@@ -34,18 +40,29 @@ class GetTopologyNodes(BaseTool, ObservabilityStackBaseClient):
 
     def _run(self) -> str:
         ObservabilityStackBaseClient.model_post_init(self)
-        data = None
         try:
-            response = self._make_request("GET", f"{self.topology_url}/nodes")
-            logger.info(f"GetTopologyNodesTool: {response.status_code}")
-            logger.info(f"GetTopologyNodesTool: {response.content}")
-            print(f"GetTopologyNodesTool: {response.status_code}")
-            print(f"GetTopologyNodesTool: {response.content}")
-            data = response.json()
-            if response.status_code == 200:
-                return data
-            return None
+            try:
+                return self._fetch(conditional=True)
+            except SnapshotOutOfSync as e:
+                # A delta that does not apply (or a missing local copy) falls back to a full download;
+                # request errors go straight to the error path below.
+                logger.warning(f"Topology snapshot out of sync, fetching the full document: {e}")
+                TOPOLOGY_SNAPSHOT.reset()
+                return self._fetch(conditional=False)
         except Exception as e:
             print(f"Error querying Topology Nodes API: {str(e)}")
             logger.error(f"Error querying Topology Nodes API: {str(e)}")
             return None
+
+    def _fetch(self, conditional: bool) -> Any:
+        headers = TOPOLOGY_SNAPSHOT.request_headers() if conditional else {}
+        response = self._make_request("GET", f"{self.topology_url}/nodes", headers=headers, stream=True)
+        logger.info(f"GetTopologyNodesTool: {response.status_code}")
+        print(f"GetTopologyNodesTool: {response.status_code}")
+        if response.status_code == NOT_MODIFIED:
+            response.close()
+            return TOPOLOGY_SNAPSHOT.update(response.status_code, response.headers)
+        if response.status_code not in (200, IM_USED):
+            response.close()
+            return None
+        return TOPOLOGY_SNAPSHOT.update(response.status_code, response.headers, self._read_json(response))
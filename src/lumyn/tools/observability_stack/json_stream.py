@@ -0,0 +1,174 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import codecs
+import json
+import logging
+import os
+from typing import Any, Iterator, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+MAX_RESPONSE_BYTES = int(os.getenv("OBSERVABILITY_MAX_RESPONSE_BYTES", 64 * 1024 * 1024))
+CHUNK_SIZE = 256 * 1024
+
+
+class ResponseTooLarge(ValueError):
+    pass
+
+
+class CappedStream():
+    """File-like view of a response body that stops after `max_bytes` and records whether more was left."""
+
+    def __init__(self, raw: Any, max_bytes: int):
+        self.raw = raw
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.exceeded = False
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self.max_bytes - self.bytes_read
+        if remaining <= 0:
+            if not self.exceeded and self.raw.read(1):
+                self.exceeded = True
+            return b""
+        chunk = self.raw.read(min(size if size and size > 0 else CHUNK_SIZE, remaining))
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def _loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class _Scanner():
+    """Decoded text of a byte stream, read on demand and dropped once consumed."""
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, raw: Any):
+        self.raw = raw
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        # Read at least as much as is still pending, so re-decoding a large value stays linear.
+        chunk = self.raw.read(max(CHUNK_SIZE, len(self.text) - self.pos))
+        self.eof = not chunk
+        self.text = self.text[self.pos:] + self._utf8.decode(chunk, final=self.eof)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or "" at the end of the stream."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.text) or not self._fill():
+                return self.text[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, got {self.peek()!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next JSON value, reading until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.text, self.pos)
+                # A number at the end of the buffer may continue in the next chunk.
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_items(raw: Any, items_path: str) -> Iterator[Any]:
+    """
+    Yield the items of the list at dotted `items_path` (e.g. "data.result")
+    one at a time, holding only the current item in memory. Values before
+    the list are skipped and anything after it is not read. A body that ends
+    mid-item (such as a CappedStream at its cap) ends the iteration.
+    """
+    scanner = _Scanner(raw)
+    for key in items_path.split("."):
+        scanner.expect("{")
+        while True:
+            if scanner.peek() == "}":
+                return
+            name = scanner.value()
+            scanner.expect(":")
+            if name == key:
+                break
+            scanner.value()
+            if scanner.peek() == ",":
+                scanner.pos += 1
+    scanner.expect("[")
+    try:
+        while scanner.peek() not in ("]", ""):
+            yield scanner.value()
+            if scanner.peek() == ",":
+                scanner.pos += 1
+    except json.JSONDecodeError:
+        if not getattr(raw, "exceeded", False):
+            raise
+
+
+def read_json(raw: Any, items_path: Optional[str] = None, max_bytes: int = MAX_RESPONSE_BYTES) -> Any:
+    """
+    Parse a JSON body from a file-like stream without holding more than
+    `max_bytes` of it.
+
+    With `items_path` given (e.g. "data" for Jaeger traces, "data.result" for
+    Prometheus), the list at that path is parsed item by item and returned as
+    {"data": [...]} (nested along the path). A body over the cap keeps the
+    items parsed so far and gains a "truncated" note. Otherwise the body is
+    read in chunks and decoded once; over the cap it raises ResponseTooLarge.
+    """
+    stream = CappedStream(raw, max_bytes)
+    if items_path:
+        items: List[Any] = list(iter_items(stream, items_path))
+        result: Any = items
+        for key in reversed(items_path.split(".")):
+            result = {key: result}
+        if stream.exceeded:
+            logger.warning(f"Response cut at {max_bytes} bytes, keeping the first {len(items)} items")
+            result["truncated"] = f"Response exceeded {max_bytes} bytes; only the first {len(items)} items are included."
+        return result
+
+    chunks = []
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    if stream.exceeded:
+        raise ResponseTooLarge(f"Response exceeded {max_bytes} bytes. Narrow the query (shorter window, fewer series or traces).")
+    return _loads(b"".join(chunks))
@@ -0,0 +1,201 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import heapq
+import logging
+import math
+import warnings
+from itertools import count, islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from .json_stream import iter_items
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Steps Prometheus range queries are rounded up to, in seconds.
+NICE_STEPS = (15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 21600, 43200, 86400)
+STAT_COLUMNS = ("min", "max", "mean", "p95", "slope_per_min", "zscore")
+# Smallest baseline spread, relative to the baseline mean (or 1), a z-score divides by.
+SPREAD_FLOOR = 1e-3
+
+
+def choose_step(start: float, end: float, max_points: int = 240) -> int:
+    """Smallest of NICE_STEPS that keeps a range query at or under `max_points` samples per series."""
+    needed = math.ceil(max(end - start, 1) / max(max_points, 1))
+    return next((step for step in NICE_STEPS if step >= needed), needed)
+
+
+def iter_series(source: Any) -> Iterator[Tuple[Dict[str, str], list]]:
+    """
+    (labels, [[timestamp, value], ...]) for each series of a Prometheus matrix
+    result, from a parsed response or incrementally from a file-like body so
+    only one series is held in memory at a time.
+    """
+    if isinstance(source, dict):
+        items = (source.get("data") or {}).get("result") or []
+    else:
+        items = iter_items(source, "data.result")
+    for series in items:
+        yield series.get("metric") or {}, series.get("values") or []
+
+
+def _to_matrix(series: List[Tuple[Dict[str, str], list]]) -> Tuple[List[Dict[str, str]], np.ndarray, np.ndarray]:
+    labels = [metric for metric, _ in series]
+    samples = [np.asarray(values, dtype=object).reshape(-1, 2) for _, values in series]
+    if not samples or not any(len(s) for s in samples):
+        return labels, np.empty(0), np.full((len(labels), 0), np.nan)
+    timestamps = np.unique(np.concatenate([s[:, 0].astype(float) for s in samples]))
+    values = np.full((len(samples), len(timestamps)), np.nan)
+    for row, s in enumerate(samples):
+        if len(s):
+            values[row, np.searchsorted(timestamps, s[:, 0].astype(float))] = s[:, 1].astype(float)
+    return labels, timestamps, values
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets downsampling to `threshold` points: keeps
+    the first and last points and, from each bucket in between, the point
+    forming the largest triangle with the previous pick and the next bucket's mean.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    picked = [0]
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        mean_x, mean_y = x[end:next_end].mean(), y[end:next_end].mean()
+        a = picked[-1]
+        area = np.abs((x[a] - mean_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (mean_y - y[a]))
+        picked.append(start + int(np.argmax(area)))
+    picked.append(n - 1)
+    return x[picked], y[picked]
+
+
+def series_stats(timestamps: np.ndarray, values: np.ndarray, baseline_fraction: float = 0.25) -> Dict[str, np.ndarray]:
+    """
+    Per-series min, max, mean, p95, least-squares slope (per minute) and the
+    z-score of the last `baseline_fraction` of the window against the first,
+    computed for all series at once. The baseline spread is floored at
+    SPREAD_FLOOR * max(|baseline mean|, 1) so that a jump off a perfectly flat
+    baseline gets a finite z-score that grows with the size of the jump.
+    """
+    values = np.where(np.isfinite(values), values, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        present = ~np.isnan(values)
+        minutes = np.broadcast_to((timestamps - (timestamps[0] if len(timestamps) else 0)) / 60.0, values.shape)
+        x = np.where(present, minutes, np.nan)
+        dx = x - np.nanmean(x, axis=1, keepdims=True)
+        dy = values - np.nanmean(values, axis=1, keepdims=True)
+        slope = np.nansum(dx * dy, axis=1) / np.nansum(dx * dx, axis=1)
+
+        edge = max(1, int(values.shape[1] * baseline_fraction))
+        early, late = values[:, :edge], values[:, -edge:]
+        baseline = np.nanmean(early, axis=1)
+        shift = np.nanmean(late, axis=1) - baseline
+        spread = np.maximum(np.nanstd(early, axis=1), SPREAD_FLOOR * np.maximum(np.abs(baseline), 1.0))
+        zscore = shift / spread
+
+        return {
+            "min": np.nanmin(values, axis=1),
+            "max": np.nanmax(values, axis=1),
+            "mean": np.nanmean(values, axis=1),
+            "p95": np.nanpercentile(values, 95, axis=1),
+            "slope_per_min": slope,
+            "zscore": zscore,
+        }
+
+
+def _label(metric: Dict[str, str]) -> str:
+    name = metric.get("__name__", "")
+    rest = ",".join(f'{key}="{value}"' for key, value in sorted(metric.items()) if key != "__name__")
+    return f"{name}{{{rest}}}" if rest or not name else name
+
+
+def _number(value: float) -> str:
+    if np.isnan(value):
+        return "-"
+    if np.isinf(value):
+        return "inf" if value > 0 else "-inf"
+    return f"{value:.4g}"
+
+
+def _batches(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def shape_range_result(series: Iterable[Tuple[Dict[str, str], list]], top_k: int = 50, points: int = 12, batch_size: int = 256) -> Dict[str, Any]:
+    """
+    Reduce a stream of range series to the `top_k` that deviate most (largest
+    |z-score|, see series_stats), each with its statistics and an LTTB
+    downsample to `points` points. Series are consumed in batches, so memory
+    stays bounded by `batch_size` + `top_k` series whatever the result size.
+    """
+    kept = []
+    order = count()
+    total = 0
+    step = None
+    for batch in _batches(series, batch_size):
+        labels, timestamps, values = _to_matrix(batch)
+        total += len(labels)
+        if not len(timestamps):
+            continue
+        if step is None and len(timestamps) > 1:
+            step = float(np.min(np.diff(timestamps)))
+        stats = series_stats(timestamps, values)
+        deviation = np.nan_to_num(np.abs(stats["zscore"]), nan=-1.0)
+        for row in range(len(labels)):
+            entry = (float(deviation[row]), -next(order), row)
+            if len(kept) >= top_k and entry[:2] <= kept[0][:2]:
+                continue
+            present = ~np.isnan(values[row])
+            shape = lttb(timestamps[present], values[row][present], points)[1] if points else np.empty(0)
+            item = (entry[0], entry[1], {"metric": labels[row], "stats": {column: float(stats[column][row]) for column in STAT_COLUMNS},
+                                         "shape": shape.tolist()})
+            if len(kept) < top_k:
+                heapq.heappush(kept, item)
+            else:
+                heapq.heapreplace(kept, item)
+    return {"series_total": total, "step": step, "series": [item[2] for item in sorted(kept, key=lambda item: item[:2], reverse=True)]}
+
+
+def format_shaped_result(shaped: Dict[str, Any]) -> str:
+    """Compact table of a shape_range_result, most shifted series first."""
+    if not shaped["series_total"]:
+        return "No series returned."
+    if not shaped["series"]:
+        return f"{shaped['series_total']} series without samples."
+    step = f", step {int(shaped['step'])}s" if shaped["step"] else ""
+    lines = [f"{shaped['series_total']} series{step}. zscore compares the last quarter of the window with the first; shape is the series downsampled.",
+             "series | " + " | ".join(STAT_COLUMNS) + " | shape"]
+    for entry in shaped["series"]:
+        lines.append(f"{_label(entry['metric'])} | " + " | ".join(_number(entry["stats"][column]) for column in STAT_COLUMNS)
+                     + " | " + " ".join(_number(value) for value in entry["shape"]))
+    if shaped["series_total"] > len(shaped["series"]):
+        lines.append(f"... {shaped['series_total'] - len(shaped['series'])} more series")
+    if shaped.get("truncated"):
+        lines.append(shaped["truncated"])
+    return "\n".join(lines)
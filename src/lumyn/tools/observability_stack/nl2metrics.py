@@ -24,13 +24,25 @@ from crewai.tools.base_tool import BaseTool
 from pydantic import BaseModel, ConfigDict, Field
 
 from lumyn.tools.linting.promql_linter import PromQLLinter
+from lumyn.tools.time_phrases import time_window_seconds
+from lumyn.tools.translation_cache import get_translation_cache
 from lumyn.config.tools import NL2MetricsCustomToolInputPrompt, NL2MetricsCustomToolPrompt, NL2MetricsSystemPrompt, NL2MetricsPrompt
 
+from .json_stream import MAX_RESPONSE_BYTES, CappedStream
+from .metrics_stats import choose_step, format_shaped_result, iter_series, shape_range_result
 from .observability_stack_base_client import ObservabilityStackBaseClient
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# Range window in seconds for queries that name no time window; 0 keeps those as instant queries.
+RANGE_WINDOW = int(os.getenv("NL2METRICS_RANGE_WINDOW", 0))
+MAX_POINTS = int(os.getenv("NL2METRICS_MAX_POINTS", 240))
+MAX_SERIES = int(os.getenv("NL2METRICS_MAX_SERIES", 50))
+SHAPE_POINTS = int(os.getenv("NL2METRICS_SHAPE_POINTS", 12))
+# Evaluation timeout passed to Prometheus, so a pathological range query is cut off server-side.
+QUERY_TIMEOUT = os.getenv("NL2METRICS_QUERY_TIMEOUT", "30s")
+
 
 class NL2MetricsCustomToolInput(BaseModel):
     nl_query: str = Field(
@@ -49,18 +61,26 @@ class NL2MetricsCustomTool(BaseTool, ObservabilityStackBaseClient):
     def _run(self, nl_query: str) -> str:
         ObservabilityStackBaseClient.model_post_init(self)
         try:
+            translation_cache = get_translation_cache()
+            cached = translation_cache.reuse(self.name, nl_query, lambda query: PromQLLinter.lint(query) == query) if translation_cache is not None else None
+            if cached is not None:
+                return self._summarize_metrics(self._query_metrics(cached.value, nl_query))
+
+            generated_at = time.time()
             function_arguments = self._generate_promql_query(prompt=nl_query)
             lint_message = PromQLLinter.lint(function_arguments)
             if lint_message != function_arguments:
                 return lint_message
-            return self._summarize_metrics(self._query_prometheus_metrics(function_arguments))
+            if translation_cache is not None:
+                translation_cache.store(self.name, nl_query, function_arguments, anchor=generated_at)
+            return self._summarize_metrics(self._query_metrics(function_arguments, nl_query))
         except Exception as exc:
             logger.error(f"NL2Metrics Tool failed with: {exc}")
             return f"NL2Metrics Tool failed with: {exc}"
 
     def _generate_promql_query(self, prompt: str) -> str:
         time_in_seconds = time.time()
-        function_arguments = self.llm_backend.inference(NL2MetricsSystemPrompt, NL2MetricsPrompt + prompt + f"\nThe current time in seconds is {time_in_seconds}")
+        function_arguments = self.llm_backend.inference_until_fence(NL2MetricsSystemPrompt, prompt + f"\nThe current time in seconds is {time_in_seconds}", "promql", prefix=NL2MetricsPrompt, call_site="nl2metrics.generate")
         logger.info(f"NL2Metrics Tool NL prompt received: {prompt}")
         logger.info(f"NL2Metrics Tool function arguments identified are: {function_arguments}")
         print(f"NL2Metrics Tool NL prompt received: {prompt}")
@@ -68,15 +88,51 @@ class NL2MetricsCustomTool(BaseTool, ObservabilityStackBaseClient):
         response = re.search(r"```promql\n(.*?)\n```", function_arguments, re.DOTALL).group(1).strip()
         return response
 
+    def _query_metrics(self, query: str, nl_query: str) -> Any:
+        """
+        Range query over the window named in the NL query (or RANGE_WINDOW),
+        reduced to the most deviating series with their statistics; instant
+        query otherwise, or when Prometheus rejects the expression as a range query.
+        """
+        window = time_window_seconds(nl_query) or RANGE_WINDOW
+        if window:
+            end = time.time()
+            shaped = self._query_prometheus_range(query, end - window, end)
+            if shaped is not None:
+                return format_shaped_result(shaped)
+        return self._query_prometheus_metrics(query)
+
+    def _query_prometheus_range(self, query: str, start: float, end: float) -> Optional[Dict[str, Any]]:
+        try:
+            url = f"{self.observability_stack_url}/prometheus/api/v1/query_range"
+            params = {"query": query, "start": start, "end": end, "step": choose_step(start, end, MAX_POINTS), "timeout": QUERY_TIMEOUT}
+            # The body is parsed series by series as it arrives instead of loaded whole.
+            response = self._make_request("GET", url, params=params, stream=True)
+            logger.info(f"NL2Metrics Tool query prometheus range: {response.status_code}, step {params['step']}s")
+            try:
+                response.raw.decode_content = True
+                source = CappedStream(response.raw, MAX_RESPONSE_BYTES)
+                shaped = shape_range_result(iter_series(source), top_k=MAX_SERIES, points=SHAPE_POINTS)
+                if source.exceeded:
+                    logger.warning(f"Range response cut at {MAX_RESPONSE_BYTES} bytes after {shaped['series_total']} series")
+                    shaped["truncated"] = f"Response exceeded {MAX_RESPONSE_BYTES} bytes; only the first {shaped['series_total']} series were considered."
+                return shaped
+            finally:
+                response.close()
+        except Exception as e:
+            logger.warning(f"Range query failed, falling back to an instant query: {str(e)}")
+            return None
+
     def _query_prometheus_metrics(self, query: str) -> Optional[Dict[str, Any]]:
         try:
             url = f"{self.observability_stack_url}/prometheus/api/v1/query"
             params = {"query": query}
 
-            response = self._make_request("GET", url, params=params)
-            logger.info(f"NL2Metrics Tool query prometheus metrics: {response.status_code}")
-            print(f"NL2Metrics Tool query prometheus metrics: {response.content}")
-            return response.json()
+            response = self._make_request("GET", url, params=params, stream=True)
+            metrics = self._read_json(response, items_path="data.result")
+            logger.info(f"NL2Metrics Tool query prometheus metrics: {response.status_code}, {len((metrics.get('data') or {}).get('result') or [])} results")
+            print(f"NL2Metrics Tool query prometheus metrics: {response.status_code}")
+            return metrics
         except Exception as e:
             print(f"Error querying Prometheus metrics: {str(e)}")
             logger.error(f"Error querying Prometheus metrics: {str(e)}")
@@ -84,5 +140,5 @@ class NL2MetricsCustomTool(BaseTool, ObservabilityStackBaseClient):
 
     def _summarize_metrics(self, metrics):
         system_prompt = "You do metrics analysis and summarization. Look at the metrics given to you and provide a brief summary and analysis of them."
-        metrics_summary = self.llm_backend.inference(system_prompt, json.dumps(metrics))
+        metrics_summary = self.llm_backend.inference(system_prompt, self.llm_backend.fit_to_budget(metrics), call_site="nl2metrics.summarize")
         return metrics_summary
@@ -16,23 +16,49 @@
 import json
 import logging
 import os
+import threading
 import time
-from typing import Any, Dict, Optional, Type
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Any, Dict, List, Optional, Type
 
 from crewai.tools.base_tool import BaseTool
 from pydantic import BaseModel, ConfigDict, Field
 
 from lumyn.tools.linting.jaeger_linter import JaegerLinter
+from lumyn.tools.translation_cache import get_translation_cache
 from lumyn.config.tools import NL2TracesCustomToolInputPrompt, NL2TracesCustomToolPrompt, NL2TracesSystemPrompt, NL2TracesPrompt
 
+from .catalog_cache import JAEGER_CATALOG
 from .custom_function_definitions_observability_stack import fd_query_jaeger_traces
 from .observability_stack_base_client import ObservabilityStackBaseClient
+from .trace_digest import digest_traces, format_digest
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# Seconds one NL2Traces call may spend on query generation, discovery and the Jaeger query (0 disables).
+DEADLINE = float(os.getenv("NL2TRACES_DEADLINE", 120))
+# Operations are prefetched for the services named in the query, or else for up to this many services.
+PREFETCH_OPERATIONS = int(os.getenv("NL2TRACES_PREFETCH_OPERATIONS", 8))
+# "llm": summarize a local trace digest with the model, "only": return the digest itself, "off": send the raw traces.
+TRACE_DIGEST = os.getenv("NL2TRACES_DIGEST", "llm")
+
+# Shared by all NL2Traces calls, so service/operation discovery overlaps with the LLM call.
+_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("NL2TRACES_WORKERS", 8)), thread_name_prefix="nl2traces")
+
+
+def _wait(future: Future, deadline: Optional[float]) -> Any:
+    return future.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+
+def _candidate_services(nl_query: str, services) -> List[str]:
+    query = nl_query.lower()
+    mentioned = [service for service in services if service.lower() in query]
+    return mentioned or sorted(services)[:PREFETCH_OPERATIONS]
+
 
 class NL2TracesCustomToolInput(BaseModel):
     nl_query: str = Field(
@@ -52,15 +78,45 @@ class NL2TracesCustomTool(BaseTool, ObservabilityStackBaseClient):
 
     def _run(self, nl_query: str) -> str:
         ObservabilityStackBaseClient.model_post_init(self)
+        deadline = time.monotonic() + DEADLINE if DEADLINE > 0 else None
         try:
-            function_name, function_arguments, current_time = self._generate_jaeger_query(prompt=nl_query)
-            services = self._get_services()
-            operations = self._get_operations(function_arguments['service'])
-            lint_message = JaegerLinter().lint(function_arguments, services,
-                                               operations, current_time)
-            if lint_message != function_arguments:
-                return lint_message
-            return self._summarize_traces(self._query_jaeger_traces(**function_arguments))
+            services_future = _EXECUTOR.submit(self._get_services)
+            operations_futures = {}
+            operations_lock = threading.Lock()
+
+            def operations_for(service):
+                with operations_lock:
+                    if service not in operations_futures:
+                        operations_futures[service] = _EXECUTOR.submit(self._get_operations, service)
+                    return operations_futures[service]
+
+            def prefetch_operations(future):
+                if future.exception() is None and future.result():
+                    for service in _candidate_services(nl_query, future.result()):
+                        operations_for(service)
+
+            def lint(function_arguments, current_time):
+                services = _wait(services_future, deadline)
+                operations = _wait(operations_for(function_arguments['service']), deadline)
+                return JaegerLinter().lint(function_arguments, services, operations, current_time)
+
+            services_future.add_done_callback(prefetch_operations)
+            translation_cache = get_translation_cache()
+            cached = translation_cache.reuse(self.name, nl_query, lambda arguments: lint(arguments, int(time.time_ns() / 1000)) == arguments) if translation_cache is not None else None
+            if cached is not None:
+                function_arguments = cached.value
+            else:
+                function_name, function_arguments, current_time = _wait(_EXECUTOR.submit(self._generate_jaeger_query, prompt=nl_query), deadline)
+                lint_message = lint(function_arguments, current_time)
+                if lint_message != function_arguments:
+                    return lint_message
+                if translation_cache is not None:
+                    translation_cache.store(self.name, nl_query, function_arguments, anchor=current_time / 1e6)
+            traces = _wait(_EXECUTOR.submit(self._query_jaeger_traces, **function_arguments), deadline)
+            return self._summarize_traces(traces)
+        except FuturesTimeout:
+            logger.error(f"NL2Traces Tool exceeded its deadline of {DEADLINE} seconds")
+            return f"NL2Traces Tool did not finish within {DEADLINE} seconds. Try a narrower query."
         except Exception as exc:
             logger.error(f"NL2Traces Tool failed with: {exc}")
             return f"NL2Traces Tool failed with: {exc}"
@@ -68,7 +124,7 @@ class NL2TracesCustomTool(BaseTool, ObservabilityStackBaseClient):
     def _generate_jaeger_query(self, prompt: str) -> str:
         time_micro = int(time.time_ns() / 1000)
         tools = [fd_query_jaeger_traces]
-        function_name, function_arguments = self.llm_backend.inference(NL2TracesSystemPrompt, NL2TracesPrompt + prompt + f"\nThe current time in microseconds is {time_micro}", tools)
+        function_name, function_arguments = self.llm_backend.inference(NL2TracesSystemPrompt, prompt + f"\nThe current time in microseconds is {time_micro}", tools, prefix=NL2TracesPrompt, call_site="nl2traces.generate")
         logger.info(f"NL2Traces Tool NL prompt received: {prompt}")
         logger.info(
             f"NL2Traces Tool function arguments identified are: {function_name} {function_arguments}"
@@ -102,39 +158,46 @@ class NL2TracesCustomTool(BaseTool, ObservabilityStackBaseClient):
                     "end": end_time,
                     "limit": 1
                 }
-            response = self._make_request("GET", url, params=params)
+            response = self._make_request("GET", url, params=params, stream=True)
+            traces = self._read_json(response, items_path="data")
             logger.info(
-                f"NL2Traces Tool query Jaeger traces: {response.status_code}"
+                f"NL2Traces Tool query Jaeger traces: {response.status_code}, {len(traces.get('data') or [])} traces"
             )
-            logger.info(
-                f"NL2Traces Tool query Jaeger traces: {response.content}")
             print(
                 f"NL2Traces Tool query Jaeger traces: {response.status_code}"
             )
-            print(
-                f"NL2Traces Tool query Jaeger traces: {response.content}")
-            return response.json()
+            return traces
         except Exception as e:
             print(f"Error querying Jaeger traces: {str(e)}")
             logger.error(f"Error querying Jaeger traces: {str(e)}")
             return f"Error querying Jaeger traces: {str(e)}"
         
     def _summarize_traces(self, traces):
+        if TRACE_DIGEST != "off" and isinstance(traces, dict):
+            # The model sees span trees, error counts and percentiles instead of every span, tag and log.
+            digest = format_digest(digest_traces(traces))
+            logger.info(f"NL2Traces Tool trace digest: {digest}")
+            if TRACE_DIGEST == "only":
+                return digest
+            traces = digest
         system_prompt = "You do trace analysis and summarization. Look at the traces given to you and provide a brief summary and analysis of them."
-        traces_summary = self.llm_backend.inference(system_prompt, json.dumps(traces))
+        traces_summary = self.llm_backend.inference(system_prompt, self.llm_backend.fit_to_budget(traces), call_site="nl2traces.summarize")
         return traces_summary
         
     def _get_services(self):
+        return JAEGER_CATALOG.get((self.observability_stack_url, "services"), self._fetch_services)
+
+    def _get_operations(self, service):
+        return JAEGER_CATALOG.get((self.observability_stack_url, "operations", service), lambda: self._fetch_operations(service))
+
+    def _fetch_services(self):
         try:
             url = f"{self.observability_stack_url}/jaeger/api/services"
             response = self._make_request("GET", url)
+            services = frozenset(response.json()['data'] or [])
             logger.info(
-                f"GetTracesFromObservabilityStack get_services: {response.status_code}")
-            logger.info(
-                f"GetTracesFromObservabilityStack get_services: {response.content}")
-            print(f"GetTracesFromObservabilityStack get_services: {response.status_code}")
-            print(f"GetTracesFromObservabilityStack get_services: {response.content}")
-            return response.json()['data']
+                f"GetTracesFromObservabilityStack get_services: {response.status_code}, {len(services)} services")
+            return services
         except Exception as e:
             print(
                 f"Error querying GetTracesFromObservabilityStack get_services: {str(e)}")
@@ -142,19 +205,17 @@ class NL2TracesCustomTool(BaseTool, ObservabilityStackBaseClient):
                 f"Error querying GetTracesFromObservabilityStack get_services: {str(e)}")
             return None
 
-    def _get_operations(self, service):
+    def _fetch_operations(self, service):
         try:
             url = f"{self.observability_stack_url}/jaeger/api/operations"
             params = {"service": service}
             response = self._make_request("GET", url, params=params)
+            # /api/operations lists {"name": ..., "spanKind": ...} objects; the linter matches on names.
+            operations = frozenset(operation['name'] if isinstance(operation, dict) else operation
+                                   for operation in response.json()['data'] or [])
             logger.info(
-                f"GetTracesFromObservabilityStack get_operations: {response.status_code}")
-            logger.info(
-                f"GetTracesFromObservabilityStack get_operations: {response.content}")
-            print(
-                f"GetTracesFromObservabilityStack get_operations: {response.status_code}")
-            print(f"GetTracesFromObservabilityStack get_operations: {response.content}")
-            return response.json()['data']
+                f"GetTracesFromObservabilityStack get_operations: {response.status_code}, {len(operations)} operations for {service}")
+            return operations
         except Exception as e:
             print(
                 f"Error querying GetTracesFromObservabilityStack get_operations: {str(e)}"
@@ -15,12 +15,18 @@
 
 import logging
 import os
-from typing import Any, Dict, Optional
+import socket
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
 from urllib3.util.retry import Retry
 
+from .json_stream import read_json
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
@@ -29,6 +35,60 @@ logger = logging.getLogger(__name__)
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", 120))
 RETRY_TOTAL = int(os.getenv("RETRY_TOTAL", 3))
 RETRY_BACKOFF_FACTOR = float(os.getenv("RETRY_BACKOFF_FACTOR", 0.3))
+HTTP_POOL_SIZE = int(os.getenv("OBSERVABILITY_HTTP_POOL_SIZE", 10))
+HTTP_KEEPALIVE_IDLE = int(os.getenv("OBSERVABILITY_HTTP_KEEPALIVE_IDLE", 60))
+
+
+def _keepalive_socket_options() -> List[Tuple[int, int, int]]:
+    if HTTP_KEEPALIVE_IDLE <= 0:
+        return []
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # Linux names; other platforms keep the OS defaults for the probe timing.
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, HTTP_KEEPALIVE_IDLE))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, HTTP_KEEPALIVE_IDLE // 4)))
+    return options
+
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections send TCP keep-alive probes, so idle ones survive NATs and proxies."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + _keepalive_socket_options()
+        super().init_poolmanager(*args, **kwargs)
+
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _create_retrying_session() -> requests.Session:
+    session = requests.Session()
+
+    retries = Retry(total=RETRY_TOTAL,
+                    backoff_factor=RETRY_BACKOFF_FACTOR,
+                    status_forcelist=[500, 502, 503, 504])
+    adapter = KeepAliveHTTPAdapter(max_retries=retries, pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_shared_session(base_url: str) -> requests.Session:
+    """
+    Process-wide retrying session for one observability endpoint (scheme and
+    host of `base_url`), so every tool call reuses its pooled TCP/TLS connections.
+    """
+    parts = urlsplit(base_url or "")
+    key = f"{parts.scheme}://{parts.netloc}"
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _create_retrying_session()
+            _sessions[key] = session
+            logger.info(f"Created shared HTTP session for {key} with a pool of {HTTP_POOL_SIZE} connections")
+        return session
 
 
 class ObservabilityStackBaseClient:
@@ -52,25 +112,22 @@ class ObservabilityStackBaseClient:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.observability_stack_service_account_token}"
         }
-        self.session = self._create_retrying_session()
-
-    def _create_retrying_session(self) -> requests.Session:
-        session = requests.Session()
+        self.session = get_shared_session(self.observability_stack_url)
 
-        retries = Retry(total=RETRY_TOTAL,
-                        backoff_factor=RETRY_BACKOFF_FACTOR,
-                        status_forcelist=[500, 502, 503, 504])
-        adapter = HTTPAdapter(max_retries=retries)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        return session
+    def _read_json(self, response: requests.Response, items_path: Optional[str] = None) -> Any:
+        """Parse a `stream=True` response incrementally, within OBSERVABILITY_MAX_RESPONSE_BYTES (see json_stream.read_json)."""
+        try:
+            response.raw.decode_content = True
+            return read_json(response.raw, items_path)
+        finally:
+            response.close()
 
     def _make_request(self, method: str, url: str,
                       **kwargs) -> requests.Response:
         try:
             response = self.session.request(method,
                                             url,
-                                            headers=self.headers,
+                                            headers={**self.headers, **kwargs.pop("headers", {})},
                                             timeout=REQUEST_TIMEOUT,
                                             **kwargs)
             response.raise_for_status()
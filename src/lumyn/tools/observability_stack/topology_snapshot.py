@@ -0,0 +1,212 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import copy
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+NOT_MODIFIED = 304
+IM_USED = 226
+
+
+class SnapshotOutOfSync(Exception):
+    """The local topology copy is missing or a delta does not apply to it; a full download is needed."""
+
+
+def content_digest(data: Any) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _pointer(path: str) -> List[str]:
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer: {path}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")]
+
+
+def _resolve(document: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        document = document[int(token)] if isinstance(document, list) else document[token]
+    return document
+
+
+def _index(container: list, token: str, adding: bool = False) -> int:
+    if adding and token == "-":
+        return len(container)
+    index = int(token)
+    if not 0 <= index < len(container) + (1 if adding else 0):
+        raise IndexError(f"JSON patch index {token} out of range")
+    return index
+
+
+def _remove(document: Any, tokens: List[str]) -> Any:
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, tokens[-1]))
+    return parent.pop(tokens[-1])
+
+
+def _add(document: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, list):
+        parent.insert(_index(parent, tokens[-1], adding=True), value)
+    else:
+        parent[tokens[-1]] = value
+    return document
+
+
+def apply_json_patch(document: Any, patch: List[Dict[str, Any]]) -> Any:
+    """Apply an RFC 6902 JSON patch in place and return the patched document (which differs when the root is replaced)."""
+    for operation in patch:
+        op = operation["op"]
+        tokens = _pointer(operation["path"])
+        if op == "add":
+            document = _add(document, tokens, operation["value"])
+        elif op == "remove":
+            _remove(document, tokens)
+        elif op == "replace":
+            if tokens:
+                _remove(document, tokens)
+            document = _add(document, tokens, operation["value"])
+        elif op in ("move", "copy"):
+            source = _pointer(operation["from"])
+            value = _remove(document, source) if op == "move" else copy.deepcopy(_resolve(document, source))
+            document = _add(document, tokens, value)
+        elif op == "test":
+            if _resolve(document, tokens) != operation["value"]:
+                raise ValueError(f"JSON patch test failed at {operation['path']}")
+        else:
+            raise ValueError(f"Unsupported JSON patch operation: {op}")
+    return document
+
+
+class TopologySnapshot():
+    """
+    Last topology document with its validators (ETag, Last-Modified) and a
+    content digest, persisted as the JSON file the report generation reads
+    plus a small `.meta.json` sidecar.
+
+    `request_headers()` makes the next fetch conditional and asks for a
+    json-patch delta (RFC 3229 `A-IM`). `update()` takes the response: 304
+    keeps the snapshot, 226 applies the patch and 200 replaces it. Servers
+    that ignore the validators still send 200; the digest then tells whether
+    anything changed, so unchanged topologies are never rewritten.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.digest: Optional[str] = None
+        self._nodes: Any = None
+        self._loaded = False
+        self.changed = False
+        if path and os.path.exists(self._meta_path(path)) and os.path.exists(path):
+            try:
+                with open(self._meta_path(path)) as f:
+                    meta = json.load(f)
+                self.etag, self.last_modified, self.digest = meta.get("etag"), meta.get("last_modified"), meta.get("digest")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable topology snapshot metadata: {e}")
+
+    @staticmethod
+    def _meta_path(path: str) -> str:
+        return f"{os.path.splitext(path)[0]}.meta.json"
+
+    @property
+    def nodes(self) -> Any:
+        # The document is only read from disk when a 304 or a delta needs it.
+        if not self._loaded and self.digest is not None and self.path:
+            with open(self.path) as f:
+                self._nodes = json.load(f)
+            self._loaded = True
+        return self._nodes
+
+    def _base(self) -> Any:
+        try:
+            return self.nodes
+        except (OSError, ValueError) as e:
+            raise SnapshotOutOfSync(f"Local topology copy unreadable: {e}") from e
+
+    def reset(self):
+        self.etag = self.last_modified = self.digest = None
+        self._nodes, self._loaded = None, True
+
+    def request_headers(self) -> Dict[str, str]:
+        if self.digest is None:
+            return {}
+        headers = {"A-IM": "json-patch"}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def update(self, status_code: int, headers: Dict[str, str], body: Any = None) -> Any:
+        """
+        Fold a topology response into the snapshot and return the current
+        document; sets `changed`. Raises SnapshotOutOfSync when a 304 or a delta
+        cannot be resolved against the local copy.
+        """
+        previous = self.digest
+        if status_code == NOT_MODIFIED:
+            nodes = self._base()
+            self.changed = False
+        else:
+            if status_code == IM_USED:
+                try:
+                    nodes = apply_json_patch(self._base(), body)
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    raise SnapshotOutOfSync(f"Topology delta does not apply: {e}") from e
+            else:
+                nodes = body
+            self.digest = content_digest(nodes)
+            self.changed = self.digest != previous
+            self._nodes, self._loaded = nodes, True
+        self.etag = headers.get("ETag") or self.etag
+        self.last_modified = headers.get("Last-Modified") or self.last_modified
+        logger.info(f"Topology {'changed' if self.changed else 'unchanged'} (HTTP {status_code})")
+        return nodes
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """Write the document and its metadata to `path` (default: the snapshot's own path) unless it already holds this digest."""
+        if self.digest is None:
+            logger.warning("No topology fetched yet, nothing to save")
+            return False
+        path = path or self.path
+        meta_path = self._meta_path(path)
+        meta = {"etag": self.etag, "last_modified": self.last_modified, "digest": self.digest}
+        try:
+            with open(meta_path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        written = not (os.path.exists(path) and saved.get("digest") == self.digest)
+        if written:
+            with open(path, "w") as f:
+                json.dump(self.nodes, f)
+        if written or saved != meta:
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+        return written
@@ -0,0 +1,243 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import math
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Tags and log fields that carry a span's error message, in order of preference.
+ERROR_MESSAGE_KEYS = ("otel.status_description", "error.message", "exception.message", "message", "event")
+
+
+class Span():
+    def __init__(self, raw: Dict[str, Any], processes: Dict[str, Any]):
+        self.span_id = raw.get("spanID")
+        self.operation = raw.get("operationName", "")
+        self.service = (processes.get(raw.get("processID")) or {}).get("serviceName", "unknown")
+        self.start = raw.get("startTime", 0)
+        self.duration = raw.get("duration", 0)
+        self.end = self.start + self.duration
+        self.parent_id = next((ref.get("spanID") for ref in raw.get("references") or [] if ref.get("refType") == "CHILD_OF"), None)
+        self.tags = {tag.get("key"): tag.get("value") for tag in raw.get("tags") or []}
+        self.logs = raw.get("logs") or []
+        self.children: List["Span"] = []
+
+    @property
+    def name(self) -> str:
+        return f"{self.service}:{self.operation}"
+
+    @property
+    def is_error(self) -> bool:
+        status = self.tags.get("http.status_code", self.tags.get("http.response.status_code"))
+        try:
+            server_error = status is not None and int(status) >= 500
+        except (TypeError, ValueError):
+            server_error = False
+        return (str(self.tags.get("error")).lower() == "true"
+                or str(self.tags.get("otel.status_code")).upper() == "ERROR"
+                or server_error)
+
+    def error_message(self) -> Optional[str]:
+        for key in ERROR_MESSAGE_KEYS:
+            if self.tags.get(key):
+                return str(self.tags[key])
+        for log in self.logs:
+            fields = {field.get("key"): field.get("value") for field in log.get("fields") or []}
+            for key in ERROR_MESSAGE_KEYS:
+                if fields.get(key):
+                    return str(fields[key])
+        status = self.tags.get("http.status_code", self.tags.get("http.response.status_code"))
+        return f"HTTP {status}" if status is not None else None
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, `q` in [0, 100]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def build_tree(raw_trace: Dict[str, Any]) -> List[Span]:
+    """
+    Spans of one Jaeger trace linked into trees; returns the roots (spans whose
+    parent is missing or is the span itself). Spans whose parents form a cycle
+    are cut loose at the earliest span of the cycle, which becomes a root.
+    """
+    processes = raw_trace.get("processes") or {}
+    spans = {span.span_id: span for span in (Span(raw, processes) for raw in raw_trace.get("spans") or [])}
+    roots = []
+    for span in spans.values():
+        parent = spans.get(span.parent_id) if span.parent_id != span.span_id else None
+        if parent is None:
+            roots.append(span)
+        else:
+            parent.children.append(span)
+    reached = {span for root in roots for span, _ in _walk(root)}
+    for span in sorted(spans.values(), key=lambda span: span.start):
+        if span not in reached:
+            spans[span.parent_id].children.remove(span)
+            roots.append(span)
+            reached.update(child for child, _ in _walk(span))
+    for span in spans.values():
+        span.children.sort(key=lambda child: child.start)
+    return sorted(roots, key=lambda root: root.start)
+
+
+def critical_path(span: Span, cursor: Optional[int] = None) -> List[Span]:
+    """
+    Spans on the critical path below `span`: walking back from the span's end,
+    the child that finished last before the cursor is on the path, then the
+    cursor moves to that child's start.
+    """
+    path = []
+    seen = set()
+    stack = [(span, cursor)]
+    while stack:
+        span, cursor = stack.pop()
+        if span in seen:
+            continue
+        seen.add(span)
+        path.append(span)
+        cursor = span.end if cursor is None else min(cursor, span.end)
+        on_path = []
+        for child in sorted(span.children, key=lambda child: child.end, reverse=True):
+            if child.start >= cursor:
+                continue
+            on_path.append((child, cursor))
+            cursor = child.start
+        stack.extend(reversed(on_path))
+    return path
+
+
+def _walk(span: Span, seen: Optional[set] = None):
+    """Depth-first (span, depth) pairs below `span`, visiting each span once even if the links loop."""
+    seen = set() if seen is None else seen
+    stack = [(span, 0)]
+    while stack:
+        span, depth = stack.pop()
+        if span in seen:
+            continue
+        seen.add(span)
+        yield span, depth
+        stack.extend((child, depth + 1) for child in reversed(span.children))
+
+
+def _ms(microseconds: Optional[float]) -> Optional[float]:
+    return None if microseconds is None else round(microseconds / 1000, 2)
+
+
+def digest_traces(payload: Any, max_tree_lines: int = 20, max_path: int = 10) -> Dict[str, Any]:
+    """
+    Deterministic summary of a Jaeger /api/traces response: per-trace span tree,
+    critical path and first erroring span, plus per-service and per-operation
+    span and error counts with latency percentiles.
+    """
+    if isinstance(payload, dict):
+        raw_traces = payload.get("data") or []
+    else:
+        raw_traces = payload if isinstance(payload, list) else []
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    traces = []
+    for raw_trace in raw_traces:
+        roots = build_tree(raw_trace)
+        spans = [span for root in roots for span, _ in _walk(root)]
+        if not spans:
+            continue
+        for span in spans:
+            durations[(span.service, span.operation)].append(span.duration)
+            errors[(span.service, span.operation)] += span.is_error
+
+        error_spans = sorted((span for span in spans if span.is_error), key=lambda span: span.start)
+        trace_start = min(span.start for span in spans)
+        trace = {
+            "trace_id": raw_trace.get("traceID"),
+            "root": roots[0].name,
+            "spans": len(spans),
+            "error_spans": len(error_spans),
+            "duration_ms": _ms(max(span.end for span in spans) - trace_start),
+            "critical_path": [{"span": span.name, "duration_ms": _ms(span.duration)}
+                              for span in sorted(critical_path(roots[0]), key=lambda span: span.start)[:max_path]],
+            "tree": _render_tree(roots, max_tree_lines),
+        }
+        if error_spans:
+            first = error_spans[0]
+            trace["first_error"] = {"span": first.name, "offset_ms": _ms(first.start - trace_start), "message": first.error_message()}
+        traces.append(trace)
+
+    services = defaultdict(lambda: {"spans": 0, "errors": 0, "durations": []})
+    for (service, operation), values in durations.items():
+        services[service]["spans"] += len(values)
+        services[service]["errors"] += errors[(service, operation)]
+        services[service]["durations"].extend(values)
+
+    def stats(values):
+        return {f"p{q}_ms": _ms(percentile(values, q)) for q in (50, 95, 99)}
+
+    digest = {
+        "traces": traces,
+        "services": {service: {"spans": entry["spans"], "errors": entry["errors"], **stats(entry["durations"])}
+                     for service, entry in sorted(services.items())},
+        "operations": [{"service": service, "operation": operation, "spans": len(values), "errors": errors[(service, operation)], **stats(values)}
+                       for (service, operation), values in sorted(durations.items(), key=lambda item: (-errors[item[0]], item[0]))],
+    }
+    if isinstance(payload, dict) and payload.get("truncated"):
+        digest["truncated"] = payload["truncated"]
+    return digest
+
+
+def _render_tree(roots: List[Span], max_lines: int) -> List[str]:
+    lines = []
+    total = 0
+    seen = set()
+    for root in roots:
+        for span, depth in _walk(root, seen=seen):
+            total += 1
+            if len(lines) < max_lines:
+                lines.append(f"{'  ' * depth}{span.name} {_ms(span.duration)}ms{' ERROR' if span.is_error else ''}")
+    if total > len(lines):
+        lines.append(f"... {total - len(lines)} more spans")
+    return lines
+
+
+def format_digest(digest: Dict[str, Any], max_operations: int = 15) -> str:
+    """Compact plain-text rendering of a digest for the summarization prompt or the agent."""
+    if not digest["traces"]:
+        return "No traces found."
+    lines = [f"{len(digest['traces'])} traces."]
+    lines.append("Services (spans, errors, p50/p95/p99 ms):")
+    for service, entry in digest["services"].items():
+        lines.append(f"- {service}: {entry['spans']} spans, {entry['errors']} errors, {entry['p50_ms']}/{entry['p95_ms']}/{entry['p99_ms']}")
+    lines.append("Operations by errors (spans, errors, p50/p95 ms):")
+    for entry in digest["operations"][:max_operations]:
+        lines.append(f"- {entry['service']}:{entry['operation']}: {entry['spans']} spans, {entry['errors']} errors, {entry['p50_ms']}/{entry['p95_ms']}")
+    if len(digest["operations"]) > max_operations:
+        lines.append(f"- ... {len(digest['operations']) - max_operations} more operations")
+    for trace in digest["traces"]:
+        lines.append(f"Trace {trace['trace_id']}: root {trace['root']}, {trace['spans']} spans, {trace['error_spans']} errors, {trace['duration_ms']}ms")
+        if "first_error" in trace:
+            error = trace["first_error"]
+            lines.append(f"  First error: {error['span']} at +{error['offset_ms']}ms: {error['message']}")
+        lines.append("  Critical path: " + " -> ".join(f"{step['span']} ({step['duration_ms']}ms)" for step in trace["critical_path"]))
+        lines.append("  Span tree:")
+        lines.extend(f"    {line}" for line in trace["tree"])
+    if digest.get("truncated"):
+        lines.append(digest["truncated"])
+    return "\n".join(lines)
@@ -42,12 +42,13 @@ class RemediationCustomTool(BaseTool):
                   "r") as f:
             rem_icl = f.read()
 
-        input = "{}\n\n===============\n\nINPUT: {}\n".format(rem_icl, diagnosis_to_remediate)
+        prefix = "{}\n\n===============\n\n".format(rem_icl)
+        input = "INPUT: {}\n".format(diagnosis_to_remediate)
         system_prompt = '''You are an IT incident remediation expert. Please provide a list of remediation steps to resolve the faults identified in the given diagnosis report. Provide a list of actionable, atomic, steps in natural language that can be later translated into bash commands. Do NOT provide the commands directly. Be as specific as possible, e.g., include values for parameters, if applicable. 
         If there are multiple separate remediation plans, please list them separately.'''
 
         try:
-            response = self.llm_backend.inference(system_prompt, input)
+            response = self.llm_backend.inference(system_prompt, input, prefix=prefix, call_site="remediation.plan")
             logger.info(f"RemediationCustomTool NL prompt received: {diagnosis_to_remediate}")
             logger.info(f"RemediationCustomTool function arguments identified are: {response}")
             print(f"RemediationCustomTool NL prompt received: {diagnosis_to_remediate}")
@@ -21,6 +21,9 @@ from crewai.tools.base_tool import BaseTool
 from pydantic import BaseModel, Field
 from crewai_tools import FileWriterTool
 from crewai.tasks import TaskOutput
+import json
+
+from lumyn.tools.report_generation.structured_output import load_schema, parse_report, response_format, retry_input
 
 
 # Initialize the tool
@@ -40,6 +43,8 @@ class CodeJSONReportCustomTool(BaseTool):
     name: str = "CodeJSONReportCustomTool"
     description: str = ("A tool that can be used to extract the JSON-formatted code commands from the input.")
     llm_backend: Any
+    call_site: str = "report.code"
+    schema_file: str = "code_schema.json"
 
     def _run(self, output: TaskOutput) -> str:
         commands = output.raw 
@@ -58,7 +63,13 @@ class CodeJSONReportCustomTool(BaseTool):
         }
         '''
         try:
-            response = self.llm_backend.inference(system_prompt, input)
+            response = self.llm_backend.inference(system_prompt, input, call_site=self.call_site, response_format=self._response_format())
+            report_schema = load_schema(self.schema_file)
+            report, errors = parse_report(response, report_schema)
+            if errors:
+                logger.warning(f"CodeJSONReportCustomTool report does not match the schema, retrying once: {errors}")
+                response = self.llm_backend.inference(system_prompt, retry_input(input, response, errors), call_site=self.call_site, response_format=self._response_format())
+                report, errors = parse_report(response, report_schema)
             logger.info(f"CodeJSONReportCustomTool NL prompt received: {commands}")
             logger.info(f"CodeJSONReportCustomTool function arguments identified are: {commands}")
             print(f"CodeJSONReportCustomTool NL prompt received: {commands}")
@@ -70,13 +81,16 @@ class CodeJSONReportCustomTool(BaseTool):
             else:
                 proj_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.getcwd())))
                 directory = os.path.join(proj_dir, os.environ.get('SRE_AGENT_EVALUATION_DIRECTORY'), os.environ.get('SRE_AGENT_NAME_VERSION_NUMBER'), os.environ.get('MODEL_AGENTS').replace('/','_'), os.environ.get('INCIDENT_NUMBER') , os.environ.get('EXP_NAME'))
-            try:
-                response = re.findall("```(.*?)```", response, re.DOTALL)[0].removeprefix('json').strip()
-            except:
-                pass
+            if report is not None:
+                response = json.dumps(report, indent=2)
+            if errors:
+                logger.error(f"CodeJSONReportCustomTool report does not match the schema: {errors}")
             writer_result = file_writer_tool._run(filename='code_struct_out.json', content=response, directory=directory,overwrite="True")
             return response
         except Exception as e:
             print(f"CodeJSONReportCustomTool error: {str(e)}")
             logger.error(f"CodeJSONReportCustomTool error: {str(e)}")
             return None
+
+    def _response_format(self):
+        return response_format("code_report", load_schema(self.schema_file))
@@ -23,6 +23,9 @@ from pydantic import BaseModel, Field
 from crewai_tools import FileWriterTool
 import json 
 import datetime
+
+from lumyn.tools.report_generation.structured_output import load_schema, parse_report, response_format, retry_input
+
 # Initialize the tool
 
 
@@ -35,6 +38,8 @@ class DiagnosisJSONReportCustomTool(BaseTool):
     name: str = "DiagnosisJSONReportCustomTool"
     description: str = ("A tool that be used to structure the identified faults from the summary of diagnosis.")
     llm_backend: Any
+    call_site: str = "report.diagnosis"
+    schema_file: str = "diagnosis_schema_updated.json"
 
     def _run(self, output: TaskOutput) -> str:
         diagnosis_summary = output.raw
@@ -74,20 +79,29 @@ class DiagnosisJSONReportCustomTool(BaseTool):
         '''.replace("###ENTITIES###",'\n'.join(entities)).replace('###SCHEMA###', schema)
 
         try:
-            response = self.llm_backend.inference(system_prompt, input)
+            response = self.llm_backend.inference(system_prompt, input, call_site=self.call_site, response_format=self._response_format())
+            report_schema = load_schema(self.schema_file)
+            report, errors = parse_report(response, report_schema)
+            if errors:
+                logger.warning(f"DiagnosisJSONReportCustomTool report does not match the schema, retrying once: {errors}")
+                response = self.llm_backend.inference(system_prompt, retry_input(input, response, errors), call_site=self.call_site, response_format=self._response_format())
+                report, errors = parse_report(response, report_schema)
             logger.info(f"DiagnosisJSONReportCustomTool NL prompt received: {diagnosis_summary}")
             logger.info(f"DiagnosisJSONReportCustomTool function arguments identified are: {response}")
             print(f"DiagnosisJSONReportCustomTool NL prompt received: {diagnosis_summary}")
             print(f"DiagnosisJSONReportCustomTool function arguments identified are: {response}")
             file_writer_tool = FileWriterTool()
             
-            try:
-                response = re.findall("```(.*?)```", response, re.DOTALL)[0].removeprefix('json').strip()
-            except:
-                pass
+            if report is not None:
+                response = json.dumps(report, indent=2)
+            if errors:
+                logger.error(f"DiagnosisJSONReportCustomTool report does not match the schema: {errors}")
             writer_result = file_writer_tool._run(filename='diagnosis_struct_out.json', content=response, directory=directory,overwrite="True")
             return response
         except Exception as e:
             print(f"DiagnosisJSONReportCustomTool error: {str(e)}")
             logger.error(f"DiagnosisJSONReportCustomTool error: {str(e)}")
             return None
+
+    def _response_format(self):
+        return response_format("diagnosis_report", load_schema(self.schema_file))
@@ -0,0 +1,191 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSING = {"{": "}", "[": "]"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"'})
+
+
+@lru_cache(maxsize=None)
+def load_schema(filename: str) -> Dict[str, Any]:
+    with open(os.path.join(DATA_DIRECTORY, filename), "r") as f:
+        return json.load(f)
+
+
+def response_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenAI-style JSON-schema response_format, translated by litellm for other providers."""
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+
+
+def _string(text: str, i: int, out: List[str]) -> Tuple[int, bool]:
+    """Copy the string whose opening quote is at `i`; returns the index after it and whether it was closed."""
+    out.append('"')
+    i += 1
+    escaped = False
+    while i < len(text):
+        char = text[i]
+        out.append(char)
+        i += 1
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            return i, True
+    return i, False
+
+
+def _skip_comment(text: str, i: int) -> int:
+    end = text.find("\n", i)
+    return len(text) if end < 0 else end
+
+
+def _close(out: List[str], stack: List[str], char: str):
+    """Close a bracket, dropping a trailing comma before it; unmatched closers are ignored."""
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+    if stack and stack[-1] == char:
+        stack.pop()
+        out.append(char)
+
+
+def _word(text: str, i: int, out: List[str]) -> int:
+    j = i
+    while j < len(text) and (text[j].isalnum() or text[j] == "_"):
+        j += 1
+    word = text[i:j]
+    out.append(_LITERALS.get(word, word))
+    return j
+
+
+def _clean(text: str) -> str:
+    """
+    Single pass over JSON-like text that drops comments and trailing commas,
+    maps Python literals, ignores text after the top-level value, and closes
+    strings and brackets left open by a truncated response.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    closed = True
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == '"':
+            i, closed = _string(text, i, out)
+            continue
+        if char == "#" or text.startswith("//", i):
+            i = _skip_comment(text, i)
+            continue
+        if char.isalpha():
+            i = _word(text, i, out)
+            continue
+        if char in _CLOSING:
+            stack.append(_CLOSING[char])
+            out.append(char)
+        elif char in "}]":
+            _close(out, stack, char)
+            if not stack:
+                break
+        else:
+            out.append(char)
+        i += 1
+
+    if not closed:
+        out.append('"')
+    while out and (out[-1].isspace() or out[-1] in ",:"):
+        out.pop()
+    out.extend(reversed(stack))
+    return "".join(out)
+
+
+def repair_json(text: str) -> Any:
+    """Parse a model's JSON answer, tolerating markdown fences, surrounding prose and common syntax slips."""
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    text = text.strip().translate(_SMART_QUOTES)
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("No JSON object found in the response.")
+    return json.loads(_clean(text[min(starts):]))
+
+
+_TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def validate(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """Check `value` against the JSON-schema subset used by the report schemas; returns the errors found."""
+    types = schema.get("type")
+    if types:
+        types = types if isinstance(types, list) else [types]
+        if not any(_TYPES[t](value) for t in types):
+            return [f"{path}: expected {' or '.join(types)}, got {type(value).__name__}"]
+    if "enum" in schema and value not in schema["enum"]:
+        return [f"{path}: {value!r} is not one of {schema['enum']}"]
+
+    errors = []
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing required key '{key}'")
+        for key, item in value.items():
+            if key in properties:
+                errors.extend(validate(item, properties[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}: unexpected key '{key}'")
+    elif isinstance(value, list) and "items" in schema:
+        for index, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{index}]"))
+    return errors
+
+
+def parse_report(response: str, schema: Dict[str, Any]) -> Tuple[Optional[Any], List[str]]:
+    """Repair and validate a report response. Returns (report, errors); report is None if nothing parsed."""
+    try:
+        report = repair_json(response)
+    except ValueError as e:
+        return None, [f"invalid JSON: {e}"]
+    return report, validate(report, schema)
+
+
+def retry_input(input: str, response: str, errors: List[str]) -> str:
+    """Input for a second attempt that shows the model its previous answer and what was wrong with it."""
+    return (f"{input}\n\nYour previous answer was:\n{response}\n\n"
+            f"It does not match the schema: {'; '.join(errors[:10])}\n"
+            "Return only the corrected JSON object.")
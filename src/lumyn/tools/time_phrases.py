@@ -0,0 +1,41 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import re
+from typing import Optional
+
+_UNITS = {"s": 1, "sec": 1, "second": 1, "m": 60, "min": 60, "minute": 60, "h": 3600, "hr": 3600, "hour": 3600,
+          "d": 86400, "day": 86400, "w": 604800, "week": 604800}
+_AMOUNT = r"(\d+(?:\.\d+)?|an?|one)"
+_UNIT = r"(seconds?|secs?|minutes?|mins?|hours?|hrs?|days?|weeks?|[smhdw])"
+_WINDOW = re.compile(rf"\b(?:(?:in|over|during|for|within|from)\s+)?(?:the\s+)?(?:last|past|previous)\s+(?:{_AMOUNT}\s*)?{_UNIT}\b")
+_AGO = re.compile(rf"\b{_AMOUNT}\s*{_UNIT}\s+ago\b")
+
+
+def _seconds(amount: Optional[str], unit: str) -> int:
+    amount = 1 if amount in (None, "a", "an", "one") else float(amount)
+    return int(amount * _UNITS[unit if len(unit) == 1 else unit.rstrip("s")])
+
+
+def time_window_seconds(query: str) -> Optional[int]:
+    """Length of the first relative time window in a query ("over the last 30 minutes" -> 1800), if any."""
+    match = _WINDOW.search(query.lower())
+    return _seconds(match.group(1), match.group(2)) if match else None
+
+
+def normalize_time_phrases(text: str) -> str:
+    """Rewrite relative time phrases in lower-case text to their length in seconds ("in the past hour" -> "last 3600s")."""
+    text = _WINDOW.sub(lambda m: f"last {_seconds(m.group(1), m.group(2))}s", text)
+    return _AGO.sub(lambda m: f"{_seconds(m.group(1), m.group(2))}s ago", text)
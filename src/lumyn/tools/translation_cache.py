@@ -0,0 +1,216 @@
+# Copyright contributors to the ITBench project. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, namedtuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from lumyn.tools.time_phrases import normalize_time_phrases
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "outputs", "translation_cache.sqlite")
+
+_QUOTES = re.compile(r"[\"'`‘’“”]([^\"'`‘’“”]+)[\"'`‘’“”]")
+_FILLER = re.compile(r"^(?:please\s+|can you\s+|could you\s+)+")
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9_.:/-]*")
+# Epoch timestamps in seconds, milliseconds, microseconds or nanoseconds.
+_EPOCH = re.compile(r"(?<![\d.])1\d{9}(?:\d{3}){0,3}(?:\.\d+)?(?![\d.])")
+
+CachedTranslation = namedtuple("CachedTranslation", ["key", "value", "anchor", "similarity"])
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a natural-language tool query: lower case, single spaces,
+    quotes around entity names dropped and relative time phrases rewritten to
+    their length in seconds ("in the past hour" -> "last 3600s").
+    """
+    text = _QUOTES.sub(r"\1", query.strip().lower())
+    text = normalize_time_phrases(text)
+    text = _FILLER.sub("", " ".join(text.split()))
+    return text.rstrip(" .?!")
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text)
+
+
+def _literals(text: str) -> Counter:
+    # Numbers, windows and entity names (anything with a digit or separator) must match exactly.
+    return Counter(token for token in _tokens(text) if any(c.isdigit() or c in "-_.:/" for c in token))
+
+
+def reanchor(value: Any, anchor: float, now: Optional[float] = None) -> Any:
+    """
+    Shift epoch timestamps in `value` (a command string, or JSON-serializable
+    arguments) that lie within a week of `anchor` (seconds) by the time elapsed
+    since, so a cached "last hour" query covers the last hour again.
+    """
+    if not isinstance(value, str):
+        return json.loads(reanchor(json.dumps(value), anchor, now))
+    text = value
+    now = time.time() if now is None else now
+    delta = now - anchor
+
+    def shift(match):
+        digits = match.group(0)
+        scale = 10 ** ((len(digits.split(".")[0]) - 10))
+        value = float(digits)
+        if abs(value / scale - anchor) > 7 * 86400:
+            return digits
+        shifted = value + delta * scale
+        return f"{shifted:.3f}" if "." in digits else str(int(shifted))
+
+    return _EPOCH.sub(shift, text)
+
+
+class TranslationCache():
+    """
+    Cross-run, SQLite-backed cache from natural-language tool queries to the
+    commands generated for them.
+
+    Lookups match the normalized query exactly. With `similarity_threshold` set,
+    a query without an exact match falls back to its TF-IDF nearest neighbour
+    among the tool's entries, but only above the threshold and only when both
+    queries carry the same numbers, windows and entity names.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = 7 * 24 * 3600, similarity_threshold: float = 0.0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "tool TEXT NOT NULL, query TEXT NOT NULL, value TEXT NOT NULL, "
+            "anchor REAL NOT NULL, created REAL NOT NULL, PRIMARY KEY (tool, query))"
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["TranslationCache"]:
+        if os.getenv("TRANSLATION_CACHE_TOOLS", "False") != "True":
+            return None
+        return cls(path=os.getenv("TRANSLATION_CACHE_PATH") or DEFAULT_CACHE_PATH,
+                   ttl_seconds=float(os.getenv("TRANSLATION_CACHE_TTL", 7 * 24 * 3600)),
+                   similarity_threshold=float(os.getenv("TRANSLATION_CACHE_SIMILARITY") or 0.0))
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created > self.ttl_seconds
+
+    def lookup(self, tool: str, query: str) -> Optional[CachedTranslation]:
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, anchor, created FROM translations WHERE tool = ? AND query = ?", (tool, key)).fetchone()
+            if row is not None and not self._expired(row[2], now):
+                self.hits += 1
+                return CachedTranslation(key, json.loads(row[0]), row[1], 1.0)
+            if self.similarity_threshold > 0:
+                rows = self._conn.execute("SELECT query, value, anchor, created FROM translations WHERE tool = ?", (tool,)).fetchall()
+                match = self._nearest(key, [r for r in rows if not self._expired(r[3], now)])
+                if match is not None:
+                    self.similar_hits += 1
+                    return match
+            self.misses += 1
+        return None
+
+    def _nearest(self, key: str, rows: list) -> Optional[CachedTranslation]:
+        literals = _literals(key)
+        candidates = [row for row in rows if _literals(row[0]) == literals]
+        if not candidates:
+            return None
+        documents = [Counter(_tokens(row[0])) for row in candidates]
+        query = Counter(_tokens(key))
+        frequency = Counter(token for document in documents + [query] for token in document)
+        total = len(documents) + 1
+
+        def vector(counts):
+            weights = {token: count * (math.log((1 + total) / (1 + frequency[token])) + 1) for token, count in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            return {token: w / norm for token, w in weights.items()}
+
+        target = vector(query)
+        best, best_score = None, 0.0
+        for row, document in zip(candidates, documents):
+            score = sum(w * target.get(token, 0.0) for token, w in vector(document).items())
+            if score > best_score:
+                best, best_score = row, score
+        if best is None or best_score < self.similarity_threshold:
+            return None
+        logger.info(f"TranslationCache: '{key}' reuses '{best[0]}' (similarity {best_score:.3f})")
+        return CachedTranslation(best[0], json.loads(best[1]), best[2], best_score)
+
+    def reuse(self, tool: str, query: str, check: Callable[[Any], bool]) -> Optional[CachedTranslation]:
+        """
+        Cached translation of `query`, re-anchored to the current time, if it
+        still passes `check` (the tool's linter); entries that fail are dropped.
+        """
+        hit = self.lookup(tool, query)
+        if hit is None:
+            return None
+        hit = hit._replace(value=reanchor(hit.value, hit.anchor))
+        if check(hit.value):
+            logger.info(f"TranslationCache: {tool} reuses a translation of '{hit.key}'")
+            return hit
+        logger.info(f"TranslationCache: {tool} translation of '{hit.key}' no longer lints, dropping it")
+        self.invalidate(tool, hit.key)
+        return None
+
+    def store(self, tool: str, query: str, value: Any, anchor: Optional[float] = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (tool, query, value, anchor, created) VALUES (?, ?, ?, ?, ?)",
+                (tool, normalize_query(query), json.dumps(value), now if anchor is None else anchor, now))
+
+    def invalidate(self, tool: str, key: str):
+        """Drop an entry by its normalized query (the `key` of a CachedTranslation)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM translations WHERE tool = ? AND query = ?", (tool, key))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM translations")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            return {"hits": self.hits, "similar_hits": self.similar_hits, "misses": self.misses, "entries": entries}
+
+
+@lru_cache(maxsize=None)
+def get_translation_cache() -> Optional[TranslationCache]:
+    cache = TranslationCache.from_env()
+    if cache is not None:
+        print(f"Translation cache enabled for NL tools at {cache.path}.")
+    return cache